@@ -0,0 +1,309 @@
+"""
+YogaGlow Headless API
+Asyncio HTTP service exposing discovery and generation as JSON endpoints, no Streamlit session needed
+"""
+
+import argparse
+import asyncio
+import hmac
+import json
+import logging
+import os
+import sys
+from typing import Dict, Optional
+
+import requests
+from aiohttp import web
+from google.api_core import exceptions as google_exceptions
+from google.generativeai.types import BlockedPromptException, StopCandidateException
+
+# Load environment variables from .env file
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from yoga_viral_discovery import YogaViralDiscovery
+from yoga_calendar import ContentCalendar, MAX_WEEKS
+from yoga_gemini import GeminiContentGenerator, sanitize_input, fallback_ideas_markdown, CAPTION_MOODS, CAPTION_CONTENT_TYPES
+from yoga_trends import TrendFetcher
+from yoga_prompt_cache import default_prefix_cache
+from yoga_router import default_router
+from yoga_hedging import GenerationTimeout, default_hedger
+
+# Service Configuration
+API_TOKEN = os.getenv('YOGAGLOW_API_TOKEN', '')
+GEMINI_TIMEOUT = float(os.getenv('YOGAGLOW_API_GEMINI_TIMEOUT', '60'))
+TRENDS_TIMEOUT = float(os.getenv('YOGAGLOW_API_TRENDS_TIMEOUT', '20'))
+MAX_CONCURRENT_GEMINI = int(os.getenv('YOGAGLOW_API_MAX_GEMINI', '16'))
+TRENDS_WORKERS = int(os.getenv('YOGAGLOW_API_TRENDS_WORKERS', '4'))
+TRENDS_CACHE_TTL = 3600
+MAX_IDEAS = 8
+
+logger = logging.getLogger(__name__)
+# What a failing Gemini or Trends call raises; anything else is a bug here and answers 500
+UPSTREAM_ERRORS = (google_exceptions.GoogleAPIError, requests.RequestException, BlockedPromptException,
+                   StopCandidateException)
+
+LIFESTYLES = ["full_time_job", "stay_at_home", "teaching_classes"]
+
+# Shared per-process state stored on the application
+DISCOVERY_KEY = web.AppKey("discovery", YogaViralDiscovery)
+GENERATOR_KEY = web.AppKey("generator", Optional[GeminiContentGenerator])
+GEMINI_SLOTS_KEY = web.AppKey("gemini_slots", asyncio.Semaphore)
+TRENDS_KEY = web.AppKey("trends", TrendFetcher)
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def json_response(data, status: int = 200) -> web.Response:
+    # Trends rows can carry numpy scalars; fall back to str for anything json can't encode
+    return web.Response(text=json.dumps(data, default=str), status=status, content_type="application/json")
+
+
+def int_param(request: web.Request, name: str, default: int, low: int, high: int) -> int:
+    raw = request.query.get(name, str(default))
+    try:
+        value = int(raw)
+    except ValueError:
+        raise ApiError(400, f"'{name}' must be an integer")
+    if not low <= value <= high:
+        raise ApiError(400, f"'{name}' must be between {low} and {high}")
+    return value
+
+
+async def read_json(request: web.Request) -> Dict:
+    try:
+        body = await request.json()
+    except (ValueError, UnicodeDecodeError):
+        raise ApiError(400, "Request body must be JSON")
+    if not isinstance(body, dict):
+        raise ApiError(400, "Request body must be a JSON object")
+    return body
+
+
+@web.middleware
+async def error_middleware(request: web.Request, handler):
+    try:
+        return await handler(request)
+    except ApiError as e:
+        return json_response({"error": e.message}, e.status)
+    except asyncio.TimeoutError:
+        return json_response({"error": "Upstream request timed out"}, 504)
+    except web.HTTPException:
+        raise
+    except google_exceptions.ResourceExhausted:
+        return json_response({"error": "Upstream quota exhausted, retry later"}, 429)
+    except UPSTREAM_ERRORS as e:
+        return json_response({"error": f"Upstream call failed ({type(e).__name__})"}, 502)
+    except Exception:
+        logger.exception("Unhandled error in %s %s", request.method, request.path)
+        return json_response({"error": "Internal server error"}, 500)
+
+
+@web.middleware
+async def auth_middleware(request: web.Request, handler):
+    if API_TOKEN and request.path != "/health":
+        supplied = request.headers.get("Authorization", "").encode("utf-8")
+        if not hmac.compare_digest(supplied, f"Bearer {API_TOKEN}".encode("utf-8")):
+            return json_response({"error": "Unauthorized"}, 401)
+    return await handler(request)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Discovery endpoints (pure catalog lookups, no upstream calls)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+async def health(request: web.Request) -> web.Response:
+    prompt_cache = default_prefix_cache()
+    return json_response({"status": "ok", "gemini": request.app[GENERATOR_KEY] is not None,
+                          "prompt_cache": prompt_cache.stats() if prompt_cache else None,
+                          "models": default_router().snapshot(), "hedging": default_hedger().stats(),
+                          "trends": request.app[TRENDS_KEY].stats()})
+
+
+async def weekly_ideas(request: web.Request) -> web.Response:
+    week = int_param(request, "week", 1, 1, 4)
+    lifestyle = request.query.get("lifestyle") or None
+    if lifestyle is not None and lifestyle not in LIFESTYLES:
+        raise ApiError(400, f"'lifestyle' must be one of {', '.join(LIFESTYLES)}")
+    niche = request.query.get("niche") or None
+    return json_response(request.app[DISCOVERY_KEY].get_content_ideas_for_beginners(week, lifestyle, niche))
+
+
+async def posting_schedule(request: web.Request) -> web.Response:
+    lifestyle = request.query.get("lifestyle", "full_time_job")
+    if lifestyle not in LIFESTYLES:
+        raise ApiError(400, f"'lifestyle' must be one of {', '.join(LIFESTYLES)}")
+    niche = request.query.get("niche") or None
+    return json_response(request.app[DISCOVERY_KEY].get_posting_schedule(lifestyle, niche))
+
+
+async def content_calendar(request: web.Request) -> web.Response:
+    first = int_param(request, "first", 1, 1, MAX_WEEKS)
+    weeks = int_param(request, "weeks", 4, 1, 52)
+    lifestyle = request.query.get("lifestyle", "full_time_job")
+    if lifestyle not in LIFESTYLES:
+        raise ApiError(400, f"'lifestyle' must be one of {', '.join(LIFESTYLES)}")
+    calendar = ContentCalendar(request.app[DISCOVERY_KEY], lifestyle, request.query.get("niche") or None)
+    return json_response({"first": first, "weeks": list(calendar.weeks(first, weeks))})
+
+
+async def hashtag_strategy(request: web.Request) -> web.Response:
+    followers = int_param(request, "followers", 100, 0, 100_000_000)
+    niche = request.query.get("niche") or None
+    return json_response(request.app[DISCOVERY_KEY].get_hashtag_strategy(followers, niche))
+
+
+async def growth_milestones(request: web.Request) -> web.Response:
+    followers = int_param(request, "followers", 100, 0, 100_000_000)
+    lifestyle = request.query.get("lifestyle", "full_time_job")
+    if lifestyle not in LIFESTYLES:
+        raise ApiError(400, f"'lifestyle' must be one of {', '.join(LIFESTYLES)}")
+    # The forecast is a Monte Carlo run: keep it off the event loop
+    loop = asyncio.get_running_loop()
+    milestones = await loop.run_in_executor(None, request.app[DISCOVERY_KEY].get_growth_milestones, followers, lifestyle)
+    return json_response(milestones)
+
+
+async def engagement_tactics(request: web.Request) -> web.Response:
+    return json_response(request.app[DISCOVERY_KEY].get_engagement_tactics())
+
+
+async def trending_content(request: web.Request) -> web.Response:
+    limit = int_param(request, "limit", 10, 1, 10)
+    sub_niche = request.query.get("sub_niche", "general")
+    return json_response(request.app[DISCOVERY_KEY].get_trending_yoga_content(sub_niche, limit))
+
+
+async def rising_searches(request: web.Request) -> web.Response:
+    keyword = sanitize_input(request.query.get("keyword", "yoga poses"))
+    if not keyword:
+        raise ApiError(400, "'keyword' must not be empty")
+
+    # Last known topics (refreshed in the background once stale); one in-flight lookup per keyword
+    trends = request.app[TRENDS_KEY]
+    result = trends.get(keyword)
+    if result["updated_at"] is None and result["refreshing"]:
+        # Nothing known yet: wait for the first lookup rather than answer with an empty list
+        await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(trends.job(keyword))), TRENDS_TIMEOUT)
+        result = trends.get(keyword)
+    return json_response(result)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Generation endpoints (Gemini, async with a global concurrency cap)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def require_generator(app: web.Application) -> GeminiContentGenerator:
+    if app[GENERATOR_KEY] is None:
+        raise ApiError(503, "GEMINI_API_KEY is not configured on this server")
+    return app[GENERATOR_KEY]
+
+
+async def generate_ideas(request: web.Request) -> web.Response:
+    generator = require_generator(request.app)
+    body = await read_json(request)
+
+    sub_niche = sanitize_input(str(body.get("sub_niche", "")))
+    if not sub_niche:
+        raise ApiError(400, "'sub_niche' is required")
+    try:
+        count = int(body.get("count", 5))
+    except (TypeError, ValueError):
+        raise ApiError(400, "'count' must be an integer")
+    if not 1 <= count <= MAX_IDEAS:
+        raise ApiError(400, f"'count' must be between 1 and {MAX_IDEAS}")
+
+    profile = body.get("profile") or {}
+    user_profile = {
+        'followers': int(profile.get('followers', 260)) if str(profile.get('followers', 260)).isdigit() else 260,
+        'lifestyle': profile.get('lifestyle') if profile.get('lifestyle') in LIFESTYLES else 'full_time_job'
+    }
+
+    async with request.app[GEMINI_SLOTS_KEY]:
+        try:
+            ideas = await asyncio.wait_for(generator.generate_yoga_content_ideas_async(sub_niche, user_profile, count), GEMINI_TIMEOUT)
+        except GenerationTimeout:
+            # Hard deadline missed even with a hedge: answer from the catalog instead of a 504
+            week = int(body.get("week", 1)) if str(body.get("week", 1)) in ("1", "2", "3", "4") else 1
+            ideas = fallback_ideas_markdown(request.app[DISCOVERY_KEY], week, count)
+            return json_response({"sub_niche": sub_niche, "count": count, "ideas": ideas, "fallback": True})
+    return json_response({"sub_niche": sub_niche, "count": count, "ideas": ideas, "fallback": False})
+
+
+async def generate_caption(request: web.Request) -> web.Response:
+    generator = require_generator(request.app)
+    body = await read_json(request)
+
+    topic = sanitize_input(str(body.get("topic", "")))
+    if not topic:
+        raise ApiError(400, "'topic' is required")
+    mood = body.get("mood", "Warm & Friendly")
+    if mood not in CAPTION_MOODS:
+        raise ApiError(400, f"'mood' must be one of {', '.join(CAPTION_MOODS)}")
+    content_type = body.get("content_type", "Tutorial")
+    if content_type not in CAPTION_CONTENT_TYPES:
+        raise ApiError(400, f"'content_type' must be one of {', '.join(CAPTION_CONTENT_TYPES)}")
+    tags = [sanitize_input(str(t)) for t in body.get("tags", []) if str(t).strip()]
+
+    # The closing hashtag block follows the account's tier mix, as in the app
+    followers = int(body.get("followers", 100)) if str(body.get("followers", 100)).isdigit() else 100
+    strategy = request.app[DISCOVERY_KEY].get_hashtag_strategy(followers, sanitize_input(str(body.get("niche") or "")) or None)
+
+    async with request.app[GEMINI_SLOTS_KEY]:
+        caption = await asyncio.wait_for(generator.generate_caption_async(topic, mood, content_type, tags, strategy),
+                                         GEMINI_TIMEOUT)
+    return json_response({"topic": topic, "mood": mood, "content_type": content_type, "caption": caption})
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# App wiring
+# ═══════════════════════════════════════════════════════════════════════════════
+
+async def on_cleanup(app: web.Application):
+    app[TRENDS_KEY].pool.shutdown(wait=False, cancel_futures=True)
+
+
+def create_app(api_key: Optional[str] = None) -> web.Application:
+    """Build the aiohttp application; shared clients are created once per process"""
+    api_key = api_key if api_key is not None else os.getenv('GEMINI_API_KEY', '')
+    app = web.Application(middlewares=[error_middleware, auth_middleware], client_max_size=64 * 1024)
+    app[DISCOVERY_KEY] = YogaViralDiscovery()
+    # One generator means one pooled upstream channel for every request
+    app[GENERATOR_KEY] = GeminiContentGenerator(api_key) if api_key else None
+    app[GEMINI_SLOTS_KEY] = asyncio.Semaphore(MAX_CONCURRENT_GEMINI)
+    app[TRENDS_KEY] = TrendFetcher(ttl=TRENDS_CACHE_TTL, workers=TRENDS_WORKERS)
+    app.on_cleanup.append(on_cleanup)
+
+    app.router.add_get("/health", health)
+    app.router.add_get("/v1/ideas/weekly", weekly_ideas)
+    app.router.add_get("/v1/schedule", posting_schedule)
+    app.router.add_get("/v1/calendar", content_calendar)
+    app.router.add_get("/v1/hashtags", hashtag_strategy)
+    app.router.add_get("/v1/milestones", growth_milestones)
+    app.router.add_get("/v1/engagement-tactics", engagement_tactics)
+    app.router.add_get("/v1/trending", trending_content)
+    app.router.add_get("/v1/trends/rising", rising_searches)
+    app.router.add_post("/v1/generate/ideas", generate_ideas)
+    app.router.add_post("/v1/generate/caption", generate_caption)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="YogaGlow headless JSON API")
+    parser.add_argument("--host", default=os.getenv('YOGAGLOW_API_HOST', '127.0.0.1'))
+    parser.add_argument("--port", type=int, default=int(os.getenv('YOGAGLOW_API_PORT', '8080')))
+    args = parser.parse_args()
+    web.run_app(create_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+YogaGlow Static Assets
+Builds the theme stylesheet into a minified, content-hashed file served from Streamlit's static/ folder
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import time
+from functools import lru_cache
+from typing import List, Dict, Optional
+
+import requests
+
+from yoga_http import default_session
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_CSS = os.path.join(APP_DIR, "assets", "yoga_glow.css")
+STATIC_DIR = os.path.join(APP_DIR, "static")
+FONTS_DIR = os.path.join(STATIC_DIR, "fonts")
+FONTS_MANIFEST = os.path.join(FONTS_DIR, "fonts.json")
+
+# Streamlit serves ./static at this path when server.enableStaticServing is on
+STATIC_URL = "app/static"
+
+# Set to 1 when static serving is unavailable: the minified CSS is inlined instead
+INLINE_CSS = os.getenv('YOGAGLOW_INLINE_CSS', '0') == '1'
+# Older builds stay this long: open pages and replicas still on the previous release keep linking to them
+KEEP_OLD_BUILDS_SECONDS = float(os.getenv('YOGAGLOW_CSS_KEEP_DAYS', '30')) * 86400
+
+# Fonts the theme uses, vendored once by `python yoga_assets.py fetch-fonts`
+FONT_FAMILIES = {
+    "Outfit": [300, 400, 500, 600, 700],
+    "Cormorant Garamond": [300, 400, 500, 600, 700],
+}
+GOOGLE_FONTS_CSS_URL = "https://fonts.googleapis.com/css2"
+
+
+def minify_css(css: str) -> str:
+    """Strip comments and whitespace the browser doesn't need"""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.DOTALL)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    css = re.sub(r":\s+", ":", css)
+    css = css.replace(";}", "}")
+    return css.strip()
+
+
+def load_font_manifest() -> List[Dict]:
+    """Font files vendored into static/fonts (empty until fetch-fonts has run)"""
+    try:
+        with open(FONTS_MANIFEST, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def google_fonts_import() -> str:
+    """The theme fonts straight from Google Fonts, as the stylesheet loaded them before they were vendored"""
+    families = "&".join(f"family={family.replace(' ', '+')}:wght@{';'.join(str(w) for w in weights)}"
+                        for family, weights in FONT_FAMILIES.items())
+    return f"@import url('{GOOGLE_FONTS_CSS_URL}?{families}&display=swap');"
+
+
+def font_face_css(font_url_prefix: str = "fonts") -> str:
+    """@font-face rules for the bundled fonts; local() first so installed fonts skip the download.
+    Until fetch-fonts has run, the Google Fonts import instead, so an unvendored deploy still gets the theme fonts"""
+    vendored = {(f["family"], f["weight"]): f["file"] for f in load_font_manifest()
+                if os.path.exists(os.path.join(FONTS_DIR, f["file"]))}
+    if not vendored:
+        return google_fonts_import()
+    rules = []
+    for family, weights in FONT_FAMILIES.items():
+        for weight in weights:
+            sources = [f"local('{family}')"]
+            if (family, weight) in vendored:
+                sources.append(f"url({font_url_prefix}/{vendored[(family, weight)]}) format('woff2')")
+            rules.append(f"@font-face {{ font-family: '{family}'; font-style: normal; font-weight: {weight}; font-display: swap; src: {', '.join(sources)}; }}")
+    return "\n".join(rules)
+
+
+def build_stylesheet() -> Dict:
+    """Minify the source stylesheet and write it as static/yoga_glow.<hash>.css"""
+    with open(SOURCE_CSS, encoding="utf-8") as f:
+        source = f.read()
+
+    css = minify_css(font_face_css() + "\n" + source)
+    digest = hashlib.sha256(css.encode("utf-8")).hexdigest()[:12]
+    filename = f"yoga_glow.{digest}.css"
+    path = os.path.join(STATIC_DIR, filename)
+
+    if not os.path.exists(path):
+        os.makedirs(STATIC_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(css)
+        os.replace(tmp_path, path)  # atomic, so replicas sharing the folder never see half a file
+    else:
+        os.utime(path)  # still in use: restart its clock for pruning
+
+    prune_old_builds(filename)
+
+    return {"filename": filename, "url": f"{STATIC_URL}/{filename}", "css": css, "bytes": len(css.encode("utf-8"))}
+
+
+def prune_old_builds(current: str, max_age: float = KEEP_OLD_BUILDS_SECONDS):
+    """Delete other stylesheet builds no replica has (re)built for max_age seconds"""
+    cutoff = time.time() - max_age
+    for old in glob.glob(os.path.join(STATIC_DIR, "yoga_glow.*.css")):
+        try:
+            if os.path.basename(old) != current and os.path.getmtime(old) < cutoff:
+                os.remove(old)
+        except OSError:
+            pass
+
+
+@lru_cache(maxsize=1)
+def stylesheet_tag() -> str:
+    """The per-rerun reference to the theme; built once per process"""
+    build = build_stylesheet()
+    if INLINE_CSS:
+        return f"<style>{build['css'].replace('url(fonts/', f'url({STATIC_URL}/fonts/')}</style>"
+    return f'<link rel="stylesheet" href="{build["url"]}">'
+
+
+def fetch_fonts(session: Optional[requests.Session] = None) -> List[Dict]:
+    """Vendor the latin woff2 files from Google Fonts into static/fonts (run once, at build time)"""
+    session = session or default_session()
+    # A modern User-Agent makes Google Fonts answer with woff2 sources
+    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36'}
+    os.makedirs(FONTS_DIR, exist_ok=True)
+
+    manifest = []
+    downloaded: Dict[str, str] = {}
+    for family, weights in FONT_FAMILIES.items():
+        params = {"family": f"{family}:wght@{';'.join(str(w) for w in weights)}", "display": "swap"}
+        response = session.get(GOOGLE_FONTS_CSS_URL, params=params, headers=headers, timeout=30)
+        response.raise_for_status()
+
+        # Each block is preceded by a subset comment; keep only the basic latin subset
+        for subset, block in re.findall(r"/\*\s*([\w-]+)\s*\*/\s*(@font-face\s*{[^}]*})", response.text):
+            if subset != "latin":
+                continue
+            weight = int(re.search(r"font-weight:\s*(\d+)", block).group(1))
+            url = re.search(r"url\((https://[^)]+\.woff2)\)", block).group(1)
+            # Variable fonts share one file across weights, so download each URL once
+            if url not in downloaded:
+                font = session.get(url, headers=headers, timeout=30)
+                font.raise_for_status()
+                downloaded[url] = f"{family.replace(' ', '')}-{weight}.woff2"
+                with open(os.path.join(FONTS_DIR, downloaded[url]), "wb") as f:
+                    f.write(font.content)
+            manifest.append({"family": family, "weight": weight, "file": downloaded[url]})
+
+    with open(FONTS_MANIFEST, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build YogaGlow static assets")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("build", help="Write the minified, hashed stylesheet into static/")
+    sub.add_parser("fetch-fonts", help="Download the theme fonts into static/fonts (needs network once)")
+    args = parser.parse_args()
+
+    if args.command == "fetch-fonts":
+        manifest = fetch_fonts()
+        print(f"Vendored {len(manifest)} font faces into {FONTS_DIR}")
+    build = build_stylesheet()
+    with open(SOURCE_CSS, encoding="utf-8") as f:
+        source_bytes = len(f.read().encode("utf-8"))
+    print(f"Built {build['url']} ({build['bytes']:,} bytes, source {source_bytes:,} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""
+YogaGlow Batch Planner
+Generates ideas, captions, schedule and hashtag strategy for many creator profiles from a CSV
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Optional, Callable
+
+# Load environment variables from .env file
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from yoga_viral_discovery import YogaViralDiscovery
+from yoga_gemini import GeminiContentGenerator, sanitize_input, CAPTION_MOODS
+from yoga_hedging import Hedger
+from yoga_dedupe import IdeaDeduper, generate_unique_ideas
+from yoga_store import ProfileStore
+
+CHECKPOINT_FILE = "checkpoint.jsonl"
+MAX_RETRIES = 4
+
+# Lifestyle labels as shown in the app, mapped to schedule keys
+LIFESTYLE_LABELS = {
+    "working full-time job": "full_time_job",
+    "stay-at-home parent": "stay_at_home",
+    "teaching yoga classes": "teaching_classes",
+    "full-time creator": "stay_at_home"
+}
+
+
+def slugify(value: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", value.lower()).strip("-")
+
+
+def normalize_lifestyle(value: str) -> str:
+    value = (value or "").strip()
+    if value in ("full_time_job", "stay_at_home", "teaching_classes"):
+        return value
+    return LIFESTYLE_LABELS.get(value.lower(), "full_time_job")
+
+
+def read_profiles(path: str) -> List[Dict]:
+    """Load creator rows; each gets a stable key used for output files and checkpointing"""
+    profiles = []
+    seen: Dict[str, int] = {}
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for row_number, row in enumerate(csv.DictReader(f), 1):
+            row = {(k or "").strip().lower(): (v or "").strip() for k, v in row.items()}
+            name = row.get("name", "")
+            base = slugify(name) or f"creator-{row_number}"
+            seen[base] = seen.get(base, 0) + 1
+            key = base if seen[base] == 1 else f"{base}-{seen[base]}"
+
+            try:
+                followers = int(float(row.get("followers") or 260))
+            except ValueError:
+                followers = 260
+            profiles.append({
+                "key": key,
+                "name": name,
+                "followers": max(0, followers),
+                "yoga_style": row.get("yoga_style") or "General/Vinyasa",
+                "lifestyle": normalize_lifestyle(row.get("lifestyle", "")),
+                "niche": sanitize_input(row.get("niche") or row.get("yoga_style") or "beginner yoga"),
+                "mood": row.get("mood") if row.get("mood") in CAPTION_MOODS else "Warm & Friendly"
+            })
+    return profiles
+
+
+class RateLimiter:
+    """Spaces calls evenly to stay under a requests-per-minute quota (0 disables it)"""
+
+    def __init__(self, per_minute: float = 0):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        time.sleep(max(0.0, slot - now))
+
+
+class UpstreamGate:
+    """Rate limit and retry on quota errors for Gemini calls, shared by every worker thread. The global cap on
+    concurrent calls is `slots`, taken per upstream attempt by the generator's Hedger (see hedger())"""
+
+    def __init__(self, max_concurrent: int, per_minute: float = 0):
+        self.slots = threading.BoundedSemaphore(max_concurrent)
+        self.limiter = RateLimiter(per_minute)
+        self.calls = 0
+        self.retries = 0
+        self.lock = threading.Lock()
+
+    def hedger(self) -> Hedger:
+        """A Hedger whose every attempt (hedged duplicates and timed-out losers included) holds one of the slots"""
+        return Hedger(slots=self.slots)
+
+    def call(self, fn: Callable[[], str]) -> str:
+        for attempt in range(MAX_RETRIES + 1):
+            self.limiter.wait()
+            try:
+                result = fn()
+                with self.lock:
+                    self.calls += 1
+                return result
+            except Exception as e:
+                retryable = type(e).__name__ in ("ResourceExhausted", "ServiceUnavailable", "DeadlineExceeded", "InternalServerError")
+                if not retryable or attempt == MAX_RETRIES:
+                    raise
+            with self.lock:
+                self.retries += 1
+            time.sleep(min(60, 2 ** attempt))  # no slot is held while backing off, so others can proceed
+
+
+class GatedGenerator:
+    """Idea calls (including dedupe refills) routed through the shared UpstreamGate"""
+
+    def __init__(self, generator: GeminiContentGenerator, gate: UpstreamGate):
+        self.generator = generator
+        self.gate = gate
+
+    def generate_ideas(self, *args, **kwargs) -> str:
+        return self.gate.call(lambda: self.generator.generate_ideas(*args, **kwargs))
+
+
+class Checkpoint:
+    """Append-only record of finished creators so an interrupted run resumes where it stopped"""
+
+    def __init__(self, output_dir: str):
+        self.path = os.path.join(output_dir, CHECKPOINT_FILE)
+        self.lock = threading.Lock()
+        self.done: Dict[str, Dict] = {}
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # a torn last line from a killed run
+                    self.done[entry["key"]] = entry
+
+    def is_done(self, key: str, output_path: str) -> bool:
+        return key in self.done and os.path.exists(output_path)
+
+    def mark_done(self, key: str, output_file: str):
+        entry = {"key": key, "file": output_file, "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        with self.lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.done[key] = entry
+
+
+def build_plan(profile: Dict, discovery: YogaViralDiscovery, generator: GeminiContentGenerator, gate: UpstreamGate,
+               deduper: IdeaDeduper, ideas_count: int, captions_count: int, week: int) -> Dict:
+    """Everything one creator needs for the week"""
+    user_profile = {"followers": profile["followers"], "lifestyle": profile["lifestyle"]}
+    # Deduped per creator, so reruns of the batch don't repeat ideas a creator already received
+    ideas, _ = generate_unique_ideas(GatedGenerator(generator, gate), deduper, f"batch:{profile['key']}",
+                                     profile["niche"], user_profile, ideas_count)
+
+    week_data = discovery.get_content_ideas_for_beginners(week)
+    hashtag_strategy = discovery.get_hashtag_strategy(profile["followers"], profile["yoga_style"])
+    captions = []
+    for idea in week_data["ideas"][:captions_count]:
+        topic = sanitize_input(idea["title"])
+        text = gate.call(lambda: generator.generate_caption(topic, profile["mood"], idea["type"], strategy=hashtag_strategy))
+        captions.append({"topic": idea["title"], "type": idea["type"], "caption": text})
+
+    return {
+        "profile": {k: v for k, v in profile.items() if k != "key"},
+        "ideas": ideas,
+        "captions": captions,
+        "week_theme": week_data["theme"],
+        "schedule": discovery.get_posting_schedule(profile["lifestyle"], profile["yoga_style"]),
+        "hashtag_strategy": hashtag_strategy
+    }
+
+
+def plan_to_markdown(plan: Dict) -> str:
+    profile = plan["profile"]
+    lines = [f"# 🧘 YogaGlow plan for {profile['name'] or 'creator'}", "",
+             f"~{profile['followers']:,} followers · {profile['yoga_style']} · {profile['lifestyle']} · niche: {profile['niche']}", "",
+             "## 💡 Content Ideas", "", plan["ideas"].strip(), "",
+             f"## ✍️ Captions (Week theme: {plan['week_theme']})", ""]
+    for caption in plan["captions"]:
+        lines += [f"### {caption['topic']} ({caption['type']})", "", caption["caption"].strip(), ""]
+
+    schedule = plan["schedule"]
+    lines += [f"## 🗓️ Posting Schedule — {schedule['name']}", "",
+              f"{schedule['posts_per_week']} posts/week · {schedule.get('reels_per_week', 0)} reels/week · {schedule.get('stories_per_day', '1-2')} stories/day", ""]
+    for day, info in schedule.get("schedule", {}).items():
+        lines.append(f"- **{day}**: {info['type']} at {info['time']} — {info['note']}")
+
+    strategy = plan["hashtag_strategy"]
+    lines += ["", f"## #️⃣ Hashtag Strategy — {strategy['strategy']} ({strategy['total_hashtags']} per post)", ""]
+    for category, details in strategy["mix"].items():
+        tags = " ".join(details.get("tags") or details.get("examples", []))
+        lines.append(f"- **{category.replace('_', ' ').title()}**: {details.get('count', '?')} tags, {details.get('range', '')} {tags}".rstrip())
+    lines += ["", f"💡 {strategy['tip']}", ""]
+    return "\n".join(lines)
+
+
+def write_atomic(path: str, content: str):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def run_batch(args, generator: Optional[GeminiContentGenerator] = None) -> int:
+    """Process every profile in the CSV; returns the number of failed creators"""
+    os.makedirs(args.output_dir, exist_ok=True)
+    profiles = read_profiles(args.csv)
+    checkpoint = Checkpoint(args.output_dir)
+    extension = "json" if args.format == "json" else "md"
+
+    pending = [p for p in profiles if not checkpoint.is_done(p["key"], os.path.join(args.output_dir, f"{p['key']}.{extension}"))]
+    print(f"{len(profiles)} creators in {args.csv}: {len(profiles) - len(pending)} already done, {len(pending)} to go")
+    if not pending:
+        return 0
+
+    gate = UpstreamGate(args.max_gemini, args.rpm)
+    # A generator passed in brings its own Hedger; give it gate.hedger() for the concurrency cap to apply
+    generator = generator or GeminiContentGenerator(args.api_key, hedger=gate.hedger())
+    discovery = YogaViralDiscovery()
+    deduper = IdeaDeduper(ProfileStore())
+    deduper.seed_catalog(discovery)
+    failures = 0
+    started = time.monotonic()
+
+    def process(profile: Dict) -> str:
+        plan = build_plan(profile, discovery, generator, gate, deduper, args.ideas, args.captions, args.week)
+        filename = f"{profile['key']}.{extension}"
+        content = json.dumps(plan, indent=2, ensure_ascii=False) if extension == "json" else plan_to_markdown(plan)
+        write_atomic(os.path.join(args.output_dir, filename), content)
+        checkpoint.mark_done(profile["key"], filename)
+        return filename
+
+    # Workers outnumber Gemini slots so schedule/hashtag work and file writes overlap with upstream waits
+    with ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix="creator") as pool:
+        futures = {pool.submit(process, profile): profile for profile in pending}
+        for done_count, future in enumerate(as_completed(futures), 1):
+            profile = futures[future]
+            try:
+                filename = future.result()
+                print(f"[{done_count}/{len(pending)}] ✅ {profile['name'] or profile['key']} → {filename}")
+            except Exception as e:
+                failures += 1
+                print(f"[{done_count}/{len(pending)}] ❌ {profile['name'] or profile['key']}: {type(e).__name__}: {e}")
+
+    elapsed = time.monotonic() - started
+    print(f"Finished in {elapsed:.1f}s — {gate.calls} Gemini calls, {gate.retries} retries, {failures} failed (rerun to retry them)")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate YogaGlow plans for many creators from a CSV")
+    parser.add_argument("csv", help="CSV with name, followers, yoga_style, lifestyle, niche (optional: mood)")
+    parser.add_argument("--output-dir", default="batch_output", help="One file per creator plus the checkpoint")
+    parser.add_argument("--format", choices=["md", "json"], default="md")
+    parser.add_argument("--ideas", type=int, default=5, help="Ideas per creator")
+    parser.add_argument("--captions", type=int, default=3, help="Captions per creator (from the week's catalog ideas)")
+    parser.add_argument("--week", type=int, default=1, choices=[1, 2, 3, 4], help="Content plan week for captions")
+    parser.add_argument("--workers", type=int, default=16, help="Creators processed in parallel")
+    parser.add_argument("--max-gemini", type=int, default=4, help="Global cap on concurrent Gemini calls")
+    parser.add_argument("--rpm", type=float, default=0, help="Gemini requests per minute quota (0 = unlimited)")
+    parser.add_argument("--api-key", default=os.getenv('GEMINI_API_KEY', ''))
+    args = parser.parse_args()
+
+    if not args.api_key:
+        parser.error("GEMINI_API_KEY is not set (use --api-key or the environment)")
+    sys.exit(1 if run_batch(args) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Content Calendar
+Lazily generated multi-month plans: rotating weekly themes, with each week's posting slots filled from the schedule
+"""
+
+import re
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Dict, Iterator, Optional
+
+THEME_WEEKS = 4  # the catalog has one theme per week for four weeks
+WEEKS_PER_MONTH = 4
+MAX_WEEKS = 520
+
+MONTH_THEMES = ["Foundation Building", "Community Growth", "Trust & Expertise", "Momentum & Collaboration"]
+
+
+def month_number(month) -> int:
+    """'Month 3' / 3 → 3"""
+    if isinstance(month, int):
+        return max(1, month)
+    match = re.search(r"\d+", str(month))
+    return max(1, int(match.group())) if match else 1
+
+
+def week_start(today: Optional[date] = None) -> date:
+    """Monday of the current week"""
+    today = today or date.today()
+    return today - timedelta(days=today.weekday())
+
+
+def theme_for(week: int) -> int:
+    """Catalog theme (1-4) for a plan week. Each 4-week cycle runs the themes in a rotated order, so a theme
+    never repeats in consecutive weeks, including across cycle boundaries"""
+    cycle, position = divmod(week - 1, THEME_WEEKS)
+    return (position + cycle) % THEME_WEEKS + 1
+
+
+class ContentCalendar:
+    """Any week of the plan is computed directly from its number; nothing is built for weeks nobody looks at"""
+
+    def __init__(self, discovery, lifestyle: str = "full_time_job", niche: Optional[str] = None,
+                 start: Optional[date] = None):
+        self.discovery = discovery
+        self.lifestyle = lifestyle
+        self.niche = niche
+        self.start = start or week_start()
+        self.schedule = discovery.get_posting_schedule(lifestyle, niche)
+        # The four catalog themes are all any plan length needs, so memory stays flat however far it runs
+        self._theme = lru_cache(maxsize=THEME_WEEKS)(self._load_theme)
+
+    def _load_theme(self, theme: int) -> Dict:
+        return self.discovery.get_content_ideas_for_beginners(theme, self.lifestyle, self.niche)
+
+    def week(self, number: int) -> Dict:
+        """One plan week: its theme, the theme's ideas and every schedule slot, dated, with reels assigned an idea"""
+        number = min(max(1, number), MAX_WEEKS)
+        theme_number = theme_for(number)
+        theme = self._theme(theme_number)
+        cycle = (number - 1) // THEME_WEEKS
+        # Rotate which idea leads each cycle, so the same idea doesn't always land on the same day
+        ideas = theme["ideas"][cycle % len(theme["ideas"]):] + theme["ideas"][:cycle % len(theme["ideas"])]
+        # More reel slots than ideas: borrow from a theme that isn't this week's or either neighbour's
+        neighbours = {theme_for(number - 1) if number > 1 else None, theme_number, theme_for(number + 1)}
+        spare = next(t for t in range(1, THEME_WEEKS + 1) if t not in neighbours)
+        queue = iter(ideas + self._theme(spare)["ideas"])
+
+        monday = self.start + timedelta(weeks=number - 1)
+        slots = []
+        for offset, (day, info) in enumerate(self.schedule.get("schedule", {}).items()):
+            idea = next(queue, None) if "Reel" in info["type"] else None
+            slots.append({"day": day, "date": (monday + timedelta(days=offset)).isoformat(), "type": info["type"],
+                          "time": info["time"], "note": info["note"],
+                          "idea": {k: idea[k] for k in ("title", "hook", "type", "duration")} if idea else None})
+        return {
+            "week": number,
+            "month": (number - 1) // WEEKS_PER_MONTH + 1,
+            "start_date": monday.isoformat(),
+            "theme": theme["theme"],
+            "focus": theme["focus"],
+            "ideas": ideas,
+            "slots": slots,
+        }
+
+    def weeks(self, first: int = 1, limit: Optional[int] = None) -> Iterator[Dict]:
+        """Weeks from `first` on, generated one at a time; without a limit it runs to MAX_WEEKS"""
+        last = MAX_WEEKS if limit is None else min(MAX_WEEKS, first + limit - 1)
+        return (self.week(n) for n in range(first, last + 1))
+
+    def month(self, month) -> Dict:
+        """One month's theme and its four weeks under week_1..week_4"""
+        number = month_number(month)
+        first = (number - 1) * WEEKS_PER_MONTH + 1
+        return {
+            "month": f"Month {number}",
+            "theme": MONTH_THEMES[(number - 1) % len(MONTH_THEMES)],
+            "weekly_rhythm": {f"week_{i}": week for i, week in enumerate(self.weeks(first, WEEKS_PER_MONTH), 1)},
+        }
+
+
+def calendar_markdown(weeks: Iterator[Dict]) -> Iterator[str]:
+    """Markdown lines for a stream of weeks; join them to export without holding the weeks in memory"""
+    for week in weeks:
+        if week["week"] % WEEKS_PER_MONTH == 1:
+            yield f"# Month {week['month']}\n"
+        yield f"## Week {week['week']} ({week['start_date']}): {week['theme']}\n"
+        yield f"_{week['focus']}_\n"
+        for slot in week["slots"]:
+            idea = f" — **{slot['idea']['title']}**" if slot["idea"] else ""
+            time = slot["time"]
+            # Clock times read "at 7:00 AM"; rest days have "-"; anything else ("Multiple") is shown as is
+            when = f" at {time}" if time[:1].isdigit() else (f" · {time}" if time != "-" else "")
+            yield f"- {slot['day']} {slot['date']}: {slot['type']}{when}{idea} ({slot['note']})"
+        yield ""
@@ -0,0 +1,125 @@
+"""
+Caption Post-Processor
+One pass over a generated caption: hashtags and mentions deduped against the creator's picks and hashtag mix,
+and the closing hashtag block trimmed to Instagram's limit by tier
+"""
+
+import re
+from typing import Dict, List, Optional
+
+from yoga_hashtags import MAX_HASHTAGS, TIERS, default_engine
+
+HASHTAG_PATTERN = re.compile(r"(?<![\w#&])#(\w+)")
+# Handles may contain dots but never end in one, so "@name." leaves the full stop in the text
+MENTION_PATTERN = re.compile(r"(?<![\w@.])@([A-Za-z0-9._]{0,29}[A-Za-z0-9_])")
+TAG_TOKEN = re.compile(r"(?<![\w#&])#\w+|(?<![\w@.])@[A-Za-z0-9._]{0,29}[A-Za-z0-9_]")
+# What may sit between tags on a tag-only line
+TAG_SEPARATORS = re.compile(r"[\s.,·•|\-–—]*")
+
+# Which closing tags survive a trim: the creator's own first, then small to large tiers, then tags the dataset
+# doesn't know (their reach can't be judged)
+PRIORITY = ["user", "branded"] + TIERS
+UNKNOWN_PRIORITY = len(PRIORITY)
+
+
+def is_tag_line(line: str) -> bool:
+    """True for lines holding only hashtags/mentions (and separators), like a caption's closing block"""
+    return bool(TAG_TOKEN.search(line)) and TAG_SEPARATORS.fullmatch(TAG_TOKEN.sub("", line)) is not None
+
+
+class CaptionProcessor:
+    """Feed the caption as it streams in: body lines come straight back out, tag-only lines are held in case
+    they are the closing block, which finish() rebuilds"""
+
+    def __init__(self, tags: Optional[List[str]] = None, strategy: Optional[Dict] = None, limit: int = MAX_HASHTAGS):
+        self.limit = limit
+        self.user_hashtags = [t for t in tags or [] if t.startswith("#")]
+        self.user_mentions = [t for t in tags or [] if t.startswith("@")]
+        # Tier of each tag in the hashtag strategy's mix
+        self.mix_tiers = {tag.lower(): tier for tier, details in (strategy or {}).get("mix", {}).items()
+                          for tag in details.get("tags", [])}
+        self.mix_tags = (strategy or {}).get("all_tags", [])
+        self.pending = ""
+        self.held: List[str] = []
+        self.body_hashtags: set = set()
+        self.body_mentions: set = set()
+        self.emitted = False
+
+    def _body_line(self, line: str) -> str:
+        """Note the line's tags; a repeated hashtag, or one past the limit, loses its '#' so the text still reads"""
+        def hashtag(match: re.Match) -> str:
+            key = match.group(1).lower()
+            if key in self.body_hashtags or len(self.body_hashtags) >= self.limit:
+                return match.group(1)
+            self.body_hashtags.add(key)
+            return match.group(0)
+        self.body_mentions.update(m.lower() for m in MENTION_PATTERN.findall(line))
+        return HASHTAG_PATTERN.sub(hashtag, line)
+
+    def _release(self) -> List[str]:
+        """Held tag lines turned out to be mid-caption: they are body after all"""
+        lines = [self._body_line(line) for line in self.held]
+        self.held = []
+        return lines
+
+    def feed(self, chunk: str) -> str:
+        """Text that is final already (complete body lines); anything that may still change is held back"""
+        *lines, self.pending = (self.pending + chunk).split("\n")
+        out = []
+        for line in lines:
+            if not line.strip() or is_tag_line(line):
+                self.held.append(line)
+            else:
+                out.extend(self._release())
+                out.append(self._body_line(line))
+        self.emitted = self.emitted or bool(out)
+        return "".join(line + "\n" for line in out)
+
+    def _priority(self, tag: str, from_user: bool) -> int:
+        if from_user:
+            return 0
+        tier = self.mix_tiers.get(tag.lower()) or default_engine().tier_of(tag)
+        return PRIORITY.index(tier) if tier in PRIORITY else UNKNOWN_PRIORITY
+
+    def finish(self) -> str:
+        """The rest of the caption, to follow what feed() returned: any last body lines, then the rebuilt closing
+        hashtags and mentions"""
+        out = []
+        if self.pending.strip() and not is_tag_line(self.pending):
+            out.extend(self._release())
+            out.append(self._body_line(self.pending))
+        elif self.pending.strip():
+            self.held.append(self.pending)
+        self.pending = ""
+        block = " ".join(self.held)
+        self.held = []
+
+        # Closing hashtags: the creator's, the model's, then the mix; each once and not already in the body
+        candidates: Dict[str, tuple] = {}
+        sources = [(self.user_hashtags, True), (["#" + t for t in HASHTAG_PATTERN.findall(block)], False), (self.mix_tags, False)]
+        for tags, from_user in sources:
+            for tag in tags:
+                key = tag[1:].lower()
+                if key not in self.body_hashtags and key not in candidates:
+                    candidates[key] = (len(candidates), tag, self._priority(tag, from_user))
+        room = max(self.limit - len(self.body_hashtags), 0)
+        kept = sorted(sorted(candidates.values(), key=lambda c: (c[2], c[0]))[:room])
+        hashtags = [tag for _, tag, _ in kept]
+
+        mentions = list(dict.fromkeys(
+            "@" + m for m in MENTION_PATTERN.findall(block) + [t[1:] for t in self.user_mentions]
+            if m.lower() not in self.body_mentions))
+
+        closing = "\n\n".join(part for part in (" ".join(hashtags), " ".join(mentions)) if part)
+        if out:
+            body = "\n".join(out).rstrip()
+            return body + "\n\n" + closing if closing else body
+        # feed() output ends in a newline; one more leaves a blank line before the tags
+        return "\n" + closing if closing and self.emitted else closing
+
+
+def process_caption(text: str, tags: Optional[List[str]] = None, strategy: Optional[Dict] = None,
+                    limit: int = MAX_HASHTAGS) -> str:
+    """Whole-caption form of CaptionProcessor"""
+    processor = CaptionProcessor(tags, strategy, limit)
+    return (processor.feed(text) + processor.finish()).rstrip()
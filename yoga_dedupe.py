@@ -0,0 +1,154 @@
+"""
+Idea Deduplication
+MinHash signatures with LSH buckets to catch near-duplicate ideas against a creator's history and the catalog
+"""
+
+import hashlib
+import re
+import threading
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+# Estimated Jaccard similarity at or above which two ideas count as the same idea
+DUPLICATE_THRESHOLD = 0.5
+CATALOG_OWNER = "catalog"
+
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(20240917)  # fixed seed: signatures must be comparable across processes
+_A = _rng.integers(1, _PRIME, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, NUM_PERM, dtype=np.uint64)
+
+IDEA_MARKER = re.compile(r"^.*🎬", re.MULTILINE)
+TITLE_PATTERN = re.compile(r"🎬\s*\**\s*Title\s*\**\s*:?\s*\**\s*(.+)")
+HOOK_PATTERN = re.compile(r"🪝\s*\**[^:\n]*:\**\s*(.+)")
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+STOPWORDS = frozenset("a an and the to of for in on with your you my i it is this that be at by from or as are".split())
+
+
+def split_ideas(markdown: str) -> Tuple[str, List[str]]:
+    """(intro, ideas): each idea starts at the line holding its 🎬 title"""
+    starts = [m.start() for m in IDEA_MARKER.finditer(markdown)]
+    if not starts:
+        return markdown, []
+    ideas = [markdown[start:end].strip() for start, end in zip(starts, starts[1:] + [len(markdown)])]
+    return markdown[:starts[0]].strip(), ideas
+
+
+def idea_title(idea: str) -> str:
+    match = TITLE_PATTERN.search(idea)
+    return match.group(1).strip(" *") if match else idea.strip().splitlines()[0][:80]
+
+
+def idea_gist(idea: str) -> str:
+    """What makes two ideas 'the same': the title and the hook, not the boilerplate around them"""
+    hook = HOOK_PATTERN.search(idea)
+    return f"{idea_title(idea)} {hook.group(1) if hook else ''}"
+
+
+def shingles(text: str) -> set:
+    words = [w for w in WORD_PATTERN.findall(text.lower()) if w not in STOPWORDS]
+    return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+def minhash(text: str) -> np.ndarray:
+    tokens = shingles(text)
+    if not tokens:
+        return np.full(NUM_PERM, _PRIME, dtype=np.uint64)
+    hashes = np.fromiter((zlib.crc32(t.encode("utf-8")) for t in tokens), dtype=np.uint64, count=len(tokens))
+    # (a*x + b) mod p for every permutation × shingle, then the minimum per permutation
+    return ((np.outer(_A, hashes) + _B[:, None]) % _PRIME).min(axis=1)
+
+
+def band_keys(signature: np.ndarray) -> List[int]:
+    """One LSH bucket per band: the band number in the top bits, a 56-bit hash of its rows below"""
+    keys = []
+    for band in range(BANDS):
+        digest = hashlib.blake2b(signature[band * ROWS:(band + 1) * ROWS].tobytes(), digest_size=7).digest()
+        keys.append((band << 56) | int.from_bytes(digest, "big"))
+    return keys
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.mean(a == b))
+
+
+def signature_bytes(signature: np.ndarray) -> bytes:
+    return signature.astype(np.uint32).tobytes()
+
+
+def signature_from_bytes(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype=np.uint32).astype(np.uint64)
+
+
+class IdeaDeduper:
+    """Checks ideas against a creator's earlier ideas and the built-in catalog; only LSH bucket-mates are compared"""
+
+    def __init__(self, index, threshold: float = DUPLICATE_THRESHOLD):
+        self.index = index
+        self.threshold = threshold
+        self.seed_lock = threading.Lock()
+
+    def seed_catalog(self, discovery):
+        """Index the weekly_themes catalog once"""
+        with self.seed_lock:
+            if self.index.owner_has_ideas(CATALOG_OWNER):
+                return
+            for week in range(1, 5):
+                for idea in discovery.get_content_ideas_for_beginners(week)["ideas"]:
+                    signature = minhash(f"{idea['title']} {idea['hook']}")
+                    self.index.add_idea(CATALOG_OWNER, idea["title"], signature_bytes(signature), band_keys(signature))
+
+    def find_duplicate(self, owner: str, signature: np.ndarray, keys: List[int]) -> Optional[str]:
+        for scope in (owner, CATALOG_OWNER):
+            for _, title, stored in self.index.idea_candidates(scope, keys):
+                if similarity(signature, signature_from_bytes(stored)) >= self.threshold:
+                    return title
+        return None
+
+    def filter_new(self, owner: str, ideas: List[str], accepted: Optional[List[tuple]] = None) -> Tuple[List[tuple], List[str]]:
+        """(accepted, duplicate_titles). Accepted entries are (idea, title, signature, keys); they are checked against
+        each other too, but only written to the index by remember(), once the answer is final"""
+        accepted = list(accepted or [])
+        duplicates = []
+        for idea in ideas:
+            signature = minhash(idea_gist(idea))
+            keys = band_keys(signature)
+            seen_here = any(similarity(signature, other[2]) >= self.threshold for other in accepted)
+            if seen_here or self.find_duplicate(owner, signature, keys):
+                duplicates.append(idea_title(idea))
+                continue
+            accepted.append((idea, idea_title(idea), signature, keys))
+        return accepted, duplicates
+
+    def remember(self, owner: str, accepted: List[tuple]):
+        for _, title, signature, keys in accepted:
+            self.index.add_idea(owner, title, signature_bytes(signature), keys)
+
+
+def generate_unique_ideas(generator, deduper: IdeaDeduper, owner: str, sub_niche: str, user_profile: Dict,
+                          count: int, ideas_markdown: Optional[str] = None) -> Tuple[str, int]:
+    """Ideas markdown with near-duplicates removed, refilled by one targeted follow-up call if any were dropped.
+    Returns (markdown, duplicates_removed). Pass ideas_markdown to dedupe an already generated (e.g. prefetched) answer."""
+    if ideas_markdown is None:
+        ideas_markdown = generator.generate_ideas(sub_niche, user_profile, count)
+    intro, ideas = split_ideas(ideas_markdown)
+    if not ideas:
+        return ideas_markdown, 0  # unrecognised layout: leave it alone
+
+    accepted, duplicates = deduper.filter_new(owner, ideas)
+    if duplicates and len(accepted) < count:
+        avoid = [entry[1] for entry in accepted] + duplicates
+        try:
+            _, refill = split_ideas(generator.generate_ideas(sub_niche, user_profile, count - len(accepted), avoid_titles=avoid))
+            accepted, _ = deduper.filter_new(owner, refill, accepted)
+            accepted = accepted[:count]
+        except Exception:
+            pass  # a failed refill still leaves the unique ideas we have
+
+    deduper.remember(owner, accepted)
+    return "\n\n".join(([intro] if intro else []) + [entry[0] for entry in accepted]), len(duplicates)
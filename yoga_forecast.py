@@ -0,0 +1,110 @@
+"""
+Growth Forecaster
+Monte Carlo follower-growth simulation: when a creator is likely to reach each milestone at their posting cadence
+"""
+
+import json
+import os
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import List, Dict, Optional
+
+import numpy as np
+
+# Weekly growth model. A reel brings reel_base + reel_rate * followers**gain_exponent new followers on average,
+# other feed posts post_ratio of that; each week's total is scaled by lognormal noise (gain_sigma), each reel has
+# viral_chance of bringing viral_multiplier times its usual gain, and churn_mean ± churn_sd of followers leave
+DEFAULT_MODEL = {
+    "reel_base": 5.0,
+    "reel_rate": 0.3,
+    "gain_exponent": 0.62,
+    "post_ratio": 0.35,
+    "gain_sigma": 0.55,
+    "viral_chance": 0.02,
+    "viral_multiplier": 15.0,
+    "churn_mean": 0.004,
+    "churn_sd": 0.002,
+}
+# Optional JSON file with any of the keys above
+MODEL_FILE = os.getenv('YOGAGLOW_GROWTH_MODEL', '')
+
+SIMULATIONS = int(os.getenv('YOGAGLOW_FORECAST_SIMULATIONS', '4000'))
+HORIZON_WEEKS = 104
+SEED = 20240917  # fixed: the same inputs always give the same forecast, so reruns don't jitter
+PERCENTILES = (10, 50, 90)
+
+
+def load_model(path: str = MODEL_FILE) -> Dict[str, float]:
+    model = dict(DEFAULT_MODEL)
+    if path:
+        with open(path, encoding="utf-8") as f:
+            model.update({key: float(value) for key, value in json.load(f).items() if key in DEFAULT_MODEL})
+    return model
+
+
+MODEL = load_model()
+
+
+def simulate(followers: int, posts_per_week: int, reels_per_week: int, targets: List[int],
+             simulations: int = SIMULATIONS, weeks: int = HORIZON_WEEKS, model: Optional[Dict] = None,
+             seed: int = SEED) -> np.ndarray:
+    """Arrival week per target (rows) and trajectory (columns); -1 where a trajectory doesn't get there in time"""
+    model = model or MODEL
+    rng = np.random.default_rng(seed)
+    other_posts = max(posts_per_week - reels_per_week, 0)
+    targets = np.asarray(targets, dtype=np.float64)[:, None]
+
+    count = np.full(simulations, float(followers))
+    arrival = np.broadcast_to(np.where(targets <= followers, 0, -1), (len(targets), simulations)).copy()
+    # Mean-one lognormal, so gain_sigma spreads outcomes without shifting the average
+    noise = rng.lognormal(-model["gain_sigma"] ** 2 / 2, model["gain_sigma"], (weeks, simulations))
+    virals = rng.binomial(reels_per_week, model["viral_chance"], (weeks, simulations))
+    churn = np.clip(rng.normal(model["churn_mean"], model["churn_sd"], (weeks, simulations)), 0, None)
+
+    for week in range(weeks):
+        per_reel = model["reel_base"] + model["reel_rate"] * count ** model["gain_exponent"]
+        gain = per_reel * (reels_per_week + model["post_ratio"] * other_posts) * noise[week]
+        gain += per_reel * (model["viral_multiplier"] - 1) * virals[week]
+        count += gain - churn[week] * count
+        np.maximum(count, 0, out=count)
+        newly = (arrival < 0) & (count >= targets)
+        arrival[newly] = week + 1
+    return arrival
+
+
+@lru_cache(maxsize=512)
+def forecast_weeks(followers: int, posts_per_week: int, reels_per_week: int, targets: tuple) -> tuple:
+    """Per target: (weeks at each of PERCENTILES or None if not reached by then, chance of reaching it in the horizon)"""
+    arrival = simulate(followers, posts_per_week, reels_per_week, list(targets))
+    results = []
+    for row in arrival:
+        reached = np.where(row >= 0, row, HORIZON_WEEKS + 1)
+        weeks = np.percentile(reached, PERCENTILES, method="inverted_cdf")
+        results.append((tuple(int(w) if w <= HORIZON_WEEKS else None for w in weeks), float(np.mean(row >= 0))))
+    return tuple(results)
+
+
+def describe_weeks(low: Optional[int], high: Optional[int]) -> str:
+    """'4-6 weeks' / '2-3 months' style range for the middle of the forecast"""
+    if low == 0 and high == 0:
+        return "Reached"
+    if high is None:
+        return f"{HORIZON_WEEKS // 52}+ years" if low is None else f"{max(1, round(low / 4.35))}+ months"
+    if high <= 10:
+        return f"{max(low, 1)}-{max(high, 1)} weeks" if high > max(low, 1) else f"~{max(high, 1)} weeks"
+    low_m, high_m = max(1, round(low / 4.35)), max(1, round(high / 4.35))
+    return f"{low_m}-{high_m} months" if high_m > low_m else f"~{high_m} months"
+
+
+def forecast_milestones(followers: int, posts_per_week: int, reels_per_week: int, targets: List[int],
+                        today: Optional[date] = None) -> List[Dict]:
+    """Percentile arrival dates per target; the simulation itself is memoized per input tuple"""
+    today = today or date.today()
+    results = forecast_weeks(int(followers), int(posts_per_week), int(reels_per_week), tuple(targets))
+    forecasts = []
+    for target, (weeks, probability) in zip(targets, results):
+        dates = {f"p{pct}": (today + timedelta(weeks=w)).isoformat() if w is not None else None
+                 for pct, w in zip(PERCENTILES, weeks)}
+        forecasts.append({"target": target, "weeks": dict(zip((f"p{pct}" for pct in PERCENTILES), weeks)),
+                          **dates, "probability": round(probability, 3), "timeframe": describe_weeks(weeks[0], weeks[-1])})
+    return forecasts
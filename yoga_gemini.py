@@ -0,0 +1,396 @@
+"""
+Gemini Content Module
+Prompt building and Gemini generation for ideas and captions, shared by the app, API and batch tools
+"""
+
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterator, List, Dict, Optional
+
+import google.generativeai as genai
+
+from yoga_captions import process_caption
+from yoga_dedupe import IDEA_MARKER, split_ideas, idea_title
+from yoga_http import configure_gemini
+from yoga_tracing import span, in_context, CLIENT
+from yoga_prompt_cache import PrefixCache, default_prefix_cache
+from yoga_router import ModelRouter, default_router
+from yoga_hedging import Hedger, default_hedger
+
+# Security Configuration
+MAX_INPUT_LENGTH = 200
+
+CAPTION_MOODS = ["Professional", "Warm & Friendly", "Playful", "Peaceful", "Motivating"]
+CAPTION_CONTENT_TYPES = ["Tutorial", "Motivational", "Personal Story", "Quick Tip", "Behind the Scenes"]
+# Caption variants compared side by side in one click, and how many are written at once
+MAX_CAPTION_VARIANTS = 5
+VARIANT_CONCURRENCY = int(os.getenv('YOGAGLOW_CAPTION_VARIANT_CONCURRENCY', '5'))
+
+# Output budgets (max_output_tokens), sized from what each request asks for. The 2.5 models spend part of that
+# budget thinking before they answer and this SDK can't cap thinking separately, so each budget includes an allowance
+TOKENS_PER_IDEA = 350
+TOKENS_PER_WORD = 1.4
+HASHTAG_TOKENS = 120
+ANALYSIS_TOKENS = 4096
+BUDGET_HEADROOM = 1.25
+THINKING_TOKENS = int(os.getenv('YOGAGLOW_THINKING_TOKENS', '2048'))
+
+
+def sanitize_input(user_input: str) -> str:
+    """Sanitize user input to prevent prompt injection attacks."""
+    if not user_input:
+        return ""
+
+    # Truncate to max length
+    sanitized = user_input[:MAX_INPUT_LENGTH]
+
+    # Remove dangerous patterns (case-insensitive)
+    dangerous_patterns = [
+        r'ignore\s+(all\s+)?previous\s+instructions?',
+        r'ignore\s+above',
+        r'disregard\s+(all\s+)?previous',
+        r'system\s*:',
+        r'assistant\s*:',
+        r'user\s*:',
+        r'<\s*script',
+        r'</\s*script',
+        r'\{\{.*\}\}',
+        r'\[\[.*\]\]',
+    ]
+
+    for pattern in dangerous_patterns:
+        sanitized = re.sub(pattern, '', sanitized, flags=re.IGNORECASE)
+
+    # Remove control characters but keep basic punctuation
+    sanitized = ''.join(char for char in sanitized if char.isprintable() or char in '\n\t')
+
+    # Escape angle brackets
+    sanitized = sanitized.replace('<', '&lt;').replace('>', '&gt;')
+
+    return sanitized.strip()
+
+
+# Stable instructions shared by every request, registered once with the prompt cache
+IDEAS_INSTRUCTIONS = """You are a warm, supportive content coach helping a yoga instructor grow their Instagram.
+
+**Every content idea you generate must be:**
+1. Achievable with just a smartphone
+2. Require minimal editing
+3. Can be filmed in 15-30 minutes
+4. Authentic and connection-building
+
+**For each idea provide:**
+
+🎬 **Title**: (Catchy but genuine)
+🪝 **Hook Script**: (First 3 seconds)
+📝 **Full Script/Steps**: (Easy-to-follow)
+⏱️ **Duration**: (Optimal length)
+📱 **Filming Tips**: (Lighting, angles)
+✨ **Why This Works**: (Simple explanation)
+#️⃣ **Hashtags**: (5 hashtags)
+🌟 **Difficulty**: Easy / Medium
+
+Keep your tone warm, encouraging, and practical!"""
+
+CAPTION_WORDS = (150, 250)
+CAPTION_INSTRUCTIONS = f"You write Instagram captions for a yoga instructor. Each caption is {CAPTION_WORDS[0]}-{CAPTION_WORDS[1]} words, uses 2-3 emojis, ends with an engagement question, and closes with a block of relevant hashtags."
+CONTINUATION_INSTRUCTIONS = "You finish Instagram captions for a yoga instructor that were cut off mid-way. Reply with only the missing rest, in the same voice, without repeating anything already written. If the caption doesn't have them yet, end with an engagement question and a block of relevant hashtags."
+
+
+def build_ideas_request(sub_niche: str, user_profile: Dict, count: int = 5, avoid_titles: Optional[List[str]] = None) -> str:
+    """The per-call part of the ideas prompt"""
+    lifestyle = user_profile.get('lifestyle', 'full_time_job')
+    followers = user_profile.get('followers', 260)
+    avoid = ""
+    if avoid_titles:
+        avoid = "\n\nThey already have these ideas, so make each new one clearly different:\n" + "\n".join(f"- {t}" for t in avoid_titles)
+
+    return f"""**About this creator:**
+- Current followers: ~{followers}
+- Lifestyle: {lifestyle}
+- Focus area: {sub_niche}
+
+Generate {count} content ideas.{avoid}"""
+
+
+def build_caption_request(topic: str, mood: str, content_type: str) -> str:
+    return f"Write a {mood.lower()} caption about: {topic}. Type: {content_type}."
+
+
+def build_ideas_prompt(sub_niche: str, user_profile: Dict, count: int = 5) -> str:
+    """Full prompt, for callers that don't use the prefix cache"""
+    return IDEAS_INSTRUCTIONS + "\n\n" + build_ideas_request(sub_niche, user_profile, count)
+
+
+def build_caption_prompt(topic: str, mood: str, content_type: str) -> str:
+    return CAPTION_INSTRUCTIONS + "\n\n" + build_caption_request(topic, mood, content_type)
+
+
+def ideas_budget(count: int) -> int:
+    return int(count * TOKENS_PER_IDEA * BUDGET_HEADROOM) + THINKING_TOKENS
+
+
+def caption_budget(rest: bool = False) -> int:
+    """The whole caption, or (rest=True) what's left of one that was cut off"""
+    answer = (CAPTION_WORDS[1] * TOKENS_PER_WORD + HASHTAG_TOKENS) * BUDGET_HEADROOM
+    return int(answer / 2 if rest else answer) + THINKING_TOKENS
+
+
+def ideas_stop(count: int):
+    """Stream check: the model has started idea count + 1, so everything asked for is already in"""
+    return lambda text: len(IDEA_MARKER.findall(text)) > count
+
+
+def finished_ideas(markdown: str, count: int, finish: str) -> tuple:
+    """(intro, up to count complete ideas); ideas is None when the layout isn't recognised, so nothing can be counted"""
+    intro, ideas = split_ideas(markdown)
+    if not ideas:
+        return intro, None
+    if finish == "MAX_TOKENS":
+        ideas = ideas[:-1]  # the budget ran out part way through the last one
+    return intro, ideas[:count]
+
+
+def join_ideas(intro: str, ideas: List[str]) -> str:
+    return "\n\n".join(([intro] if intro else []) + ideas)
+
+
+def complete_sentences(text: str) -> str:
+    """Text up to its last finished sentence or line, so a continuation never has to pick up mid-word"""
+    cut = max(text.rfind(mark) for mark in ".!?\n")
+    return text[:cut + 1] if cut > 0 else text
+
+
+def build_continuation_request(partial: str) -> str:
+    return f"Continue right after the last sentence of this caption:\n\n{partial}"
+
+
+def join_continuation(partial: str, rest: str) -> str:
+    return partial + ("" if partial.endswith("\n") else " ") + rest.lstrip(" ")
+
+
+def close_stream(response):
+    """Stop a streamed response that wasn't read to the end, so its connection is freed now rather than left
+    open until the model finishes; the SDK has no public close, so this cancels the call under it"""
+    iterator = getattr(response, "_iterator", None)
+    if iterator is None or getattr(response, "_done", True):
+        return
+    for name in ("cancel", "close"):  # gRPC call / REST body reader, or a plain generator
+        if hasattr(iterator, name):
+            getattr(iterator, name)()
+            return
+
+
+async def aclose_stream(response):
+    """Async counterpart of close_stream (the gRPC stream is an async generator over the call)"""
+    iterator = getattr(response, "_iterator", None)
+    if iterator is None or getattr(response, "_done", True):
+        return
+    if hasattr(iterator, "aclose"):
+        await iterator.aclose()
+    elif hasattr(iterator, "cancel"):
+        iterator.cancel()
+
+
+class StreamReader:
+    """Collects a streamed response; feed() returns False once the stop check says the rest isn't needed"""
+
+    def __init__(self, stop=None):
+        self.stop = stop
+        self.parts: List[str] = []
+        self.finish = "STOP"
+        self.usage = None
+
+    def feed(self, chunk) -> bool:
+        self.usage = getattr(chunk, "usage_metadata", None) or self.usage
+        for candidate in chunk.candidates[:1]:
+            self.parts.extend(part.text for part in candidate.content.parts if part.text)
+            reason = candidate.finish_reason
+            if reason:
+                # An enum over gRPC, a plain int over the REST transport
+                self.finish = getattr(reason, "name", None) or genai.protos.Candidate.FinishReason(reason).name
+        if self.stop is not None and self.stop("".join(self.parts)):
+            self.finish = "EARLY_STOP"
+            return False
+        return True
+
+    def annotate(self, call_span):
+        call_span.set("gen_ai.response.finish_reasons", self.finish)
+        if self.usage is not None:
+            call_span.set("gen_ai.usage.input_tokens", self.usage.prompt_token_count)
+            call_span.set("gen_ai.usage.output_tokens", self.usage.candidates_token_count)
+            call_span.set("gen_ai.usage.cached_tokens", self.usage.cached_content_token_count)
+
+    def result(self) -> tuple:
+        text = "".join(self.parts)
+        if not text:
+            raise ValueError(f"Empty response (finish reason {self.finish})")
+        return text, self.finish
+
+
+def fallback_ideas_markdown(discovery, week: int, count: int = 5) -> str:
+    """Catalog ideas from get_content_ideas_for_beginners, starting at `week`, in the generated-ideas layout"""
+    ideas = []
+    for offset in range(4):
+        ideas.extend(discovery.get_content_ideas_for_beginners((week - 1 + offset) % 4 + 1)["ideas"])
+        if len(ideas) >= count:
+            break
+    blocks = []
+    for i, idea in enumerate(ideas[:count], 1):
+        blocks.append(
+            f"### {i}. {idea['title']}\n\n"
+            f"🪝 **Hook Script**: {idea['hook']}\n\n"
+            f"📝 **Full Script/Steps**:\n{idea['script']}\n\n"
+            f"⏱️ **Duration**: {idea['duration']}\n\n"
+            f"📱 **Filming Tips**: {idea['equipment']}, post {idea['best_time']}\n\n"
+            f"#️⃣ **Hashtags**: {' '.join(idea['hashtags'])}\n\n"
+            f"🌟 **Difficulty**: {idea['difficulty']}"
+        )
+    return "\n\n---\n\n".join(blocks)
+
+
+class GeminiContentGenerator:
+    def __init__(self, api_key: str, model_name: Optional[str] = None, prefix_cache: Optional[PrefixCache] = None,
+                 router: Optional[ModelRouter] = None, hedger: Optional[Hedger] = None):
+        """model_name pins every task to one model; otherwise the router picks per task"""
+        configure_gemini(api_key)
+        self.api_key = api_key
+        self.model_name = model_name
+        self.models: Dict[str, genai.GenerativeModel] = {}
+        self.prefix_cache = prefix_cache or default_prefix_cache()
+        self.router = router or default_router()
+        self.hedger = hedger or (Hedger(self.router) if router else default_hedger())
+
+    def _plain_model(self, model_name: str) -> genai.GenerativeModel:
+        if model_name not in self.models:
+            self.models[model_name] = genai.GenerativeModel(model_name)
+        return self.models[model_name]
+
+    def _request(self, task: str, instructions: str, request: str):
+        """Model name, model and contents for a call: the cached prefix plus the small suffix, or the full prompt"""
+        model_name = self.model_name or self.router.choose(task)
+        if self.prefix_cache is None:
+            return model_name, self._plain_model(model_name), instructions + "\n\n" + request
+        return model_name, self.prefix_cache.model_for(self.api_key, model_name, instructions), request
+
+    def _call(self, task: str, model_name: str, model, contents, budget: int, stop=None) -> tuple:
+        """(text, finish reason) of one streamed call, capped at `budget` output tokens"""
+        deadline = self.hedger.deadline(task)
+
+        def attempt() -> tuple:
+            with self.router.timed(model_name):
+                reader = StreamReader(stop)
+                chunks = model.generate_content(contents, generation_config={"max_output_tokens": budget}, stream=True,
+                                                request_options={"timeout": deadline})
+                try:
+                    for chunk in chunks:
+                        if not reader.feed(chunk):
+                            break
+                finally:
+                    close_stream(chunks)
+                reader.annotate(call_span)
+                return reader.result()
+        with span("gemini.generate", self._span_attributes(task, model_name, budget), CLIENT) as call_span:
+            return self.hedger.run(task, model_name, attempt)
+
+    def _span_attributes(self, task: str, model_name: str, budget: int) -> Dict:
+        return {"gen_ai.system": "gemini", "gen_ai.request.model": model_name, "gen_ai.request.max_tokens": budget,
+                "yoga.task": task, "yoga.prompt_cache": type(self.prefix_cache).__name__ if self.prefix_cache else "off"}
+
+    def _generate(self, task: str, instructions: str, request: str, budget: int, stop=None) -> tuple:
+        return self._call(task, *self._request(task, instructions, request), budget, stop)
+
+    async def _generate_async(self, task: str, instructions: str, request: str, budget: int, stop=None) -> tuple:
+        model_name, model, contents = self._request(task, instructions, request)
+        deadline = self.hedger.deadline(task)
+
+        async def attempt() -> tuple:
+            with self.router.timed(model_name):
+                reader = StreamReader(stop)
+                chunks = await model.generate_content_async(contents, generation_config={"max_output_tokens": budget},
+                                                            stream=True, request_options={"timeout": deadline})
+                try:
+                    async for chunk in chunks:
+                        if not reader.feed(chunk):
+                            break
+                finally:
+                    await aclose_stream(chunks)
+                reader.annotate(call_span)
+                return reader.result()
+        with span("gemini.generate", self._span_attributes(task, model_name, budget), CLIENT) as call_span:
+            return await self.hedger.run_async(task, model_name, attempt)
+
+    def generate_ideas(self, sub_niche: str, user_profile: Dict, count: int = 5, avoid_titles: Optional[List[str]] = None) -> str:
+        """Idea markdown; raises on API errors so callers can retry or report them"""
+        request = build_ideas_request(sub_niche, user_profile, count, avoid_titles)
+        markdown, finish = self._generate("ideas", IDEAS_INSTRUCTIONS, request, ideas_budget(count), ideas_stop(count))
+        intro, ideas = finished_ideas(markdown, count, finish)
+        if ideas is None or len(ideas) >= count:
+            return markdown if ideas is None else join_ideas(intro, ideas)
+        # Cut off or short: ask for just the missing ideas, steering away from the ones we have
+        missing = count - len(ideas)
+        request = build_ideas_request(sub_niche, user_profile, missing, (avoid_titles or []) + [idea_title(i) for i in ideas])
+        more, finish = self._generate("ideas", IDEAS_INSTRUCTIONS, request, ideas_budget(missing), ideas_stop(missing))
+        return join_ideas(intro, ideas + (finished_ideas(more, missing, finish)[1] or []))
+
+    def generate_yoga_content_ideas(self, sub_niche: str, user_profile: Dict, count: int = 5) -> str:
+        try:
+            return self.generate_ideas(sub_niche, user_profile, count)
+        except Exception as e:
+            return f"Error: {str(e)}"
+
+    def generate_caption(self, topic: str, mood: str, content_type: str, tags: Optional[List[str]] = None,
+                         strategy: Optional[Dict] = None) -> str:
+        """Caption text with the tags and hashtag mix merged in (see process_caption); raises on API errors so
+        callers can report them"""
+        caption, finish = self._generate("captions", CAPTION_INSTRUCTIONS, build_caption_request(topic, mood, content_type),
+                                         caption_budget())
+        if finish == "MAX_TOKENS":
+            caption = complete_sentences(caption)
+            rest, _ = self._generate("captions", CONTINUATION_INSTRUCTIONS, build_continuation_request(caption),
+                                     caption_budget(rest=True))
+            caption = join_continuation(caption, rest)
+        return process_caption(caption, tags, strategy)
+
+    def generate_caption_variants(self, topic: str, variants: List[tuple], tags: Optional[List[str]] = None,
+                                  strategy: Optional[Dict] = None, max_concurrent: int = VARIANT_CONCURRENCY) -> Iterator[tuple]:
+        """(index, caption or the exception it raised) per (mood, content_type) variant, as each one finishes"""
+        pool = ThreadPoolExecutor(max_workers=max(1, min(max_concurrent, len(variants))), thread_name_prefix="variant")
+        futures = {pool.submit(in_context(self.generate_caption), topic, mood, content_type, tags, strategy): i
+                   for i, (mood, content_type) in enumerate(variants)}
+        try:
+            for future in as_completed(futures):
+                error = future.exception()
+                yield futures[future], error if error is not None else future.result()
+        finally:
+            # Abandoned part way (e.g. the page reran): drop variants not started yet, let running calls finish
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def generate_viral_analysis(self, analysis_prompt: str) -> str:
+        """Free-form analysis (e.g. create_viral_analysis_prompt_yoga output); raises on API errors"""
+        model_name = self.model_name or self.router.choose("analysis")
+        return self._call("analysis", model_name, self._plain_model(model_name), analysis_prompt, ANALYSIS_TOKENS + THINKING_TOKENS)[0]
+
+    async def generate_yoga_content_ideas_async(self, sub_niche: str, user_profile: Dict, count: int = 5) -> str:
+        """Same as generate_ideas, without blocking the event loop; raises on API errors"""
+        markdown, finish = await self._generate_async("ideas", IDEAS_INSTRUCTIONS, build_ideas_request(sub_niche, user_profile, count),
+                                                      ideas_budget(count), ideas_stop(count))
+        intro, ideas = finished_ideas(markdown, count, finish)
+        if ideas is None or len(ideas) >= count:
+            return markdown if ideas is None else join_ideas(intro, ideas)
+        missing = count - len(ideas)
+        request = build_ideas_request(sub_niche, user_profile, missing, [idea_title(i) for i in ideas])
+        more, finish = await self._generate_async("ideas", IDEAS_INSTRUCTIONS, request, ideas_budget(missing), ideas_stop(missing))
+        return join_ideas(intro, ideas + (finished_ideas(more, missing, finish)[1] or []))
+
+    async def generate_caption_async(self, topic: str, mood: str, content_type: str, tags: Optional[List[str]] = None,
+                                     strategy: Optional[Dict] = None) -> str:
+        caption, finish = await self._generate_async("captions", CAPTION_INSTRUCTIONS, build_caption_request(topic, mood, content_type),
+                                                     caption_budget())
+        if finish == "MAX_TOKENS":
+            caption = complete_sentences(caption)
+            rest, _ = await self._generate_async("captions", CONTINUATION_INSTRUCTIONS, build_continuation_request(caption),
+                                                 caption_budget(rest=True))
+            caption = join_continuation(caption, rest)
+        return process_caption(caption, tags, strategy)
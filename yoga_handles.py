@@ -0,0 +1,131 @@
+"""
+Handle Directory
+Accounts to tag, loaded from a local file, with prefix autocomplete and Instagram handle validation
+"""
+
+import bisect
+import csv
+import os
+import re
+from typing import List, Dict, Optional
+
+import numpy as np
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+# CSV with handle, category, followers, niches ("|"-separated); point this at a bigger export to cover more accounts
+DATA_PATH = os.getenv('YOGAGLOW_HANDLE_DATA') or os.path.join(APP_DIR, "assets", "handles.csv")
+
+# Instagram usernames: 1-30 letters, digits, periods and underscores; no leading, trailing or doubled period
+HANDLE_PATTERN = re.compile(r"@?((?!\.)(?!.*\.\.)[A-Za-z0-9._]{1,30}(?<!\.))")
+PREFIX_PATTERN = re.compile(r"@?([A-Za-z0-9._]{1,30})")
+# Sorts after every character a handle can contain, so [prefix, prefix + END) spans all completions
+PREFIX_END = "\x7f"
+
+TIER_NAMES = ["nano", "micro", "mid", "macro", "mega"]
+TIER_EDGES = [10_000, 100_000, 500_000, 1_000_000]
+TOP_SIZE = 50
+
+
+def normalize_handle(text: str) -> Optional[str]:
+    """'@Yoga.Journal ' → '@yoga.journal'; None if it isn't a valid Instagram handle"""
+    match = HANDLE_PATTERN.fullmatch(text.strip())
+    return "@" + match.group(1).lower() if match else None
+
+
+def follower_tier(followers: int) -> str:
+    return TIER_NAMES[bisect.bisect_right(TIER_EDGES, followers)]
+
+
+def load_dataset(path: str = DATA_PATH) -> tuple:
+    """(handles, categories, followers, niches); invalid handles are skipped, repeats keep their largest row"""
+    merged: Dict[str, list] = {}
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            handle = normalize_handle(row["handle"])
+            if handle is None:
+                continue
+            followers = int(row.get("followers") or 0)
+            niches = frozenset(n.strip() for n in (row.get("niches") or "").split("|") if n.strip())
+            if handle not in merged or followers > merged[handle][1]:
+                merged[handle] = [(row.get("category") or "Other").strip(), followers, niches]
+    handles = list(merged)
+    return (handles, [merged[h][0] for h in handles], np.array([merged[h][1] for h in handles], dtype=np.int64),
+            [merged[h][2] for h in handles])
+
+
+class HandleDirectory:
+    """Handles kept in one sorted array: a prefix's completions are the contiguous slice found by two bisects"""
+
+    def __init__(self, handles: List[str], categories: List[str], followers: np.ndarray, niches: List[frozenset]):
+        order = sorted(range(len(handles)), key=handles.__getitem__)
+        self.handles = [handles[i] for i in order]
+        self.keys = [h[1:] for h in self.handles]  # without the '@', for bisect
+        self.followers = followers[order]
+        codes, self.categories = self._factorize([categories[i] for i in order])
+        self.category_codes = np.array(codes, dtype=np.int32)
+        self.niches = [niches[i] for i in order]
+        self.index = {handle: i for i, handle in enumerate(self.handles)}
+
+        # Most-followed accounts overall, per category and per niche, for suggestions before anything is typed
+        by_followers = np.argsort(-self.followers, kind="stable")
+        self.top_all = by_followers[:TOP_SIZE].tolist()
+        self.top_category = {c: by_followers[self.category_codes[by_followers] == code][:TOP_SIZE].tolist()
+                             for code, c in enumerate(self.categories)}
+        self.top_niche: Dict[str, List[int]] = {}
+        for i in by_followers:
+            for niche in self.niches[i]:
+                bucket = self.top_niche.setdefault(niche, [])
+                if len(bucket) < TOP_SIZE:
+                    bucket.append(int(i))
+
+    @staticmethod
+    def _factorize(values: List[str]) -> tuple:
+        labels: Dict[str, int] = {}
+        codes = [labels.setdefault(v, len(labels)) for v in values]
+        return codes, list(labels)
+
+    @classmethod
+    def from_file(cls, path: str = DATA_PATH) -> "HandleDirectory":
+        return cls(*load_dataset(path))
+
+    def __len__(self) -> int:
+        return len(self.handles)
+
+    def _entry(self, i: int) -> Dict:
+        followers = int(self.followers[i])
+        return {"handle": self.handles[i], "category": self.categories[self.category_codes[i]],
+                "followers": followers, "tier": follower_tier(followers), "niches": sorted(self.niches[i])}
+
+    def get(self, handle: str) -> Optional[Dict]:
+        i = self.index.get(handle.lower() if handle.startswith("@") else "@" + handle.lower())
+        return self._entry(i) if i is not None else None
+
+    def complete(self, prefix: str, limit: int = 8, category: Optional[str] = None) -> List[Dict]:
+        """Most-followed handles starting with prefix (optionally in one category)"""
+        match = PREFIX_PATTERN.fullmatch(prefix.strip())
+        if not match:
+            return []
+        key = match.group(1).lower()
+        lo = bisect.bisect_left(self.keys, key)
+        hi = bisect.bisect_left(self.keys, key + PREFIX_END, lo)
+        positions = np.arange(lo, hi)
+        if category is not None:
+            if category not in self.categories:
+                return []
+            positions = positions[self.category_codes[lo:hi] == self.categories.index(category)]
+        if len(positions) > limit:
+            # Only the top `limit` need ordering, not the whole slice
+            followers = self.followers[positions]
+            positions = positions[np.argpartition(-followers, limit - 1)[:limit]]
+        positions = sorted(positions.tolist(), key=lambda i: -self.followers[i])
+        return [self._entry(i) for i in positions]
+
+    def top(self, category: Optional[str] = None, niche: Optional[str] = None, limit: int = 12) -> List[Dict]:
+        """Suggestions with no prefix: a category's or niche's most-followed accounts, else the directory's"""
+        if category is not None:
+            positions = self.top_category.get(category, [])
+        elif niche is not None and niche in self.top_niche:
+            positions = self.top_niche[niche]
+        else:
+            positions = self.top_all
+        return [self._entry(i) for i in positions[:limit]]
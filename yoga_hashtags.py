@@ -0,0 +1,197 @@
+"""
+Hashtag Engine
+Builds a per-post hashtag mix from a local dataset of tags, post counts and niches, for any follower count
+"""
+
+import bisect
+import csv
+import math
+import os
+import threading
+from functools import lru_cache
+from typing import List, Dict, Optional
+
+import numpy as np
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+# CSV with tag, posts, niches ("|"-separated); point this at a bigger export to cover more tags
+DATA_PATH = os.getenv('YOGAGLOW_HASHTAG_DATA') or os.path.join(APP_DIR, "assets", "hashtags.csv")
+MAX_HASHTAGS = 30  # Instagram's per-post limit
+
+# Post-count tiers: [lower, upper) bounds; tags under MIN_POSTS are too quiet to bring anyone
+MIN_POSTS = 1_000
+TIERS = ["small_niche", "medium_niche", "large_broad", "mega_discovery"]
+TIER_EDGES = np.array([MIN_POSTS, 50_000, 500_000, 2_000_000])
+TIER_RANGES = {"small_niche": "1K-50K posts", "medium_niche": "50K-500K posts",
+               "large_broad": "500K-2M posts", "mega_discovery": "2M+ posts (for Explore)"}
+
+# Tags per tier at a few account sizes; counts in between are interpolated on a log scale
+MIX_FOLLOWERS = np.log10([100, 750, 5_000, 100_000])
+MIX_COUNTS = np.array([
+    [10, 8, 4, 2],    # small_niche
+    [8, 10, 8, 6],    # medium_niche
+    [5, 8, 10, 10],   # large_broad
+    [2, 4, 3, 5],     # mega_discovery
+])
+BRANDED_FROM = 1_000
+BRANDED_COUNT = 2
+
+STRATEGY_EDGES = [500, 1_000, 10_000]
+STRATEGIES = [
+    ("Micro-Niche Focus", "Focus on smaller hashtags where you can actually rank! Big hashtags bury small accounts."),
+    ("Growth Expansion", "You can start competing in medium-sized hashtags now!"),
+    ("Authority Building", "Time to create your own branded hashtag for community!"),
+    ("Community Leadership", "Your posts can hold their own in big hashtags; keep a few niche tags to stay discoverable."),
+]
+
+# Profile yoga focus → dataset niche
+STYLE_NICHES = {
+    "General/Vinyasa": "general", "Beginner-Friendly": "beginner", "Flexibility": "flexibility",
+    "Stress Relief": "stress", "Desk Yoga": "desk", "Yoga for Sleep": "sleep"
+}
+
+
+def load_dataset(path: str = DATA_PATH) -> tuple:
+    """(tags, posts, niches) with rows for the same tag merged; niches is a list of sets"""
+    merged: Dict[str, list] = {}
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            tag = "#" + row["tag"].strip().lstrip("#").lower()
+            if tag == "#":
+                continue
+            entry = merged.setdefault(tag, [0, set()])
+            entry[0] = max(entry[0], int(row["posts"] or 0))
+            entry[1].update(n.strip() for n in (row.get("niches") or "").split("|") if n.strip())
+    tags = list(merged)
+    return tags, np.array([merged[t][0] for t in tags], dtype=np.int64), [merged[t][1] for t in tags]
+
+
+class HashtagEngine:
+    """Tags sorted by post count once at load, so each tier is a contiguous slice found by binary search"""
+
+    def __init__(self, tags: List[str], posts: np.ndarray, niches: List[set]):
+        order = np.argsort(posts, kind="stable")
+        self.posts = posts[order]
+        self.tags = [tags[i] for i in order]
+        self.tiers = np.digitize(self.posts, TIER_EDGES) - 1  # -1 below MIN_POSTS, else an index into TIERS
+
+        # Per niche: positions into the sorted arrays (already ascending by posts) and their post counts
+        members: Dict[str, list] = {}
+        for position, i in enumerate(order):
+            for niche in niches[i]:
+                members.setdefault(niche, []).append(position)
+        self.niche_index = {niche: np.array(positions, dtype=np.int64) for niche, positions in members.items()}
+        self.niche_posts = {niche: self.posts[positions] for niche, positions in self.niche_index.items()}
+        # Where each tier starts and ends, per niche and overall
+        self.niche_bounds = {niche: self._bounds(posts) for niche, posts in self.niche_posts.items()}
+        self.bounds = self._bounds(self.posts)
+        self._tier_lookup: Optional[Dict[str, int]] = None
+
+    @staticmethod
+    def _bounds(posts: np.ndarray) -> List[int]:
+        return np.searchsorted(posts, TIER_EDGES).tolist() + [len(posts)]
+
+    @classmethod
+    def from_file(cls, path: str = DATA_PATH) -> "HashtagEngine":
+        return cls(*load_dataset(path))
+
+    def __len__(self) -> int:
+        return len(self.tags)
+
+    def tier_counts(self) -> Dict[str, int]:
+        counts = np.bincount(self.tiers[self.tiers >= 0], minlength=len(TIERS))
+        return {tier: int(n) for tier, n in zip(TIERS, counts)}
+
+    def tier_of(self, tag: str) -> Optional[str]:
+        """Tier name for a tag ('#YogaLife' or 'yogalife'); None if it isn't in the dataset or is too quiet"""
+        if self._tier_lookup is None:
+            # Built on first use: strategy() never needs it
+            self._tier_lookup = dict(zip(self.tags, self.tiers.tolist()))
+        tier = self._tier_lookup.get("#" + tag.lstrip("#").lower(), -1)
+        return TIERS[tier] if tier >= 0 else None
+
+    @staticmethod
+    def mix_for(follower_count: int) -> Dict[str, int]:
+        x = math.log10(max(follower_count, 1))
+        return {tier: int(round(np.interp(x, MIX_FOLLOWERS, MIX_COUNTS[i]))) for i, tier in enumerate(TIERS)}
+
+    @staticmethod
+    def target_posts(tier: int, follower_count: int) -> int:
+        """Where in the tier to aim: the low end for tiny accounts, moving up (geometrically) as they grow"""
+        low = TIER_EDGES[tier]
+        high = TIER_EDGES[tier + 1] if tier + 1 < len(TIER_EDGES) else low * 50
+        position = min(max((math.log10(max(follower_count, 1)) - 2) / 4, 0.0), 1.0)
+        return np.int64(low * (high / low) ** position)  # same dtype as the posts array, so searchsorted won't convert it
+
+    def _pick(self, niche: Optional[str], tier: int, target: int, count: int, taken: set) -> List[int]:
+        """Up to count positions in one tier (of a niche, or of all tags) around the target post count"""
+        if niche is None:
+            positions, posts, bounds = None, self.posts, self.bounds
+        else:
+            positions, posts, bounds = self.niche_index[niche], self.niche_posts[niche], self.niche_bounds[niche]
+        start, end = bounds[tier], bounds[tier + 1]
+        if start >= end:
+            return []
+        # A window of tags centred on the target, with room to skip tags another source already picked
+        width = count + len(taken)
+        center = int(posts.searchsorted(target))
+        lo = min(max(center - width // 2, start), max(end - width, start))
+        hi = min(lo + width, end)
+        window = positions[lo:hi].tolist() if positions is not None else range(lo, hi)
+        picked = [p for p in window if p not in taken][:count]
+        taken.update(picked)
+        return picked
+
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def plan(follower_count: int) -> tuple:
+        """(name, tip, branded count, [(tier, count, target posts)]): everything that depends only on the account size"""
+        name, tip = STRATEGIES[bisect.bisect_right(STRATEGY_EDGES, follower_count)]
+        branded = BRANDED_COUNT if follower_count >= BRANDED_FROM else 0
+        budget = MAX_HASHTAGS - branded
+        tiers = []
+        for tier, count in enumerate(HashtagEngine.mix_for(follower_count).values()):
+            count = min(count, budget)
+            budget -= count
+            tiers.append((tier, count, HashtagEngine.target_posts(tier, follower_count)))
+        return name, tip, branded, tiers
+
+    def strategy(self, follower_count: int = 100, niche: Optional[str] = None) -> Dict:
+        niche = STYLE_NICHES.get(niche, niche)
+        name, tip, branded, tiers = self.plan(follower_count)
+        mix = {}
+        taken: set = set()
+        if branded:
+            mix["branded"] = {"count": branded, "range": "Your own hashtags", "tags": [], "examples": []}
+
+        for tier, count, target in tiers:
+            tier_name = TIERS[tier]
+            picked = []
+            # The creator's niche first, then general yoga tags, then anything in the tier
+            for source in dict.fromkeys([niche, "general", None]):
+                if len(picked) < count and (source is None or source in self.niche_index):
+                    picked += self._pick(source, tier, target, count - len(picked), taken)
+            tags = [self.tags[p] for p in picked]
+            mix[tier_name] = {"count": count, "range": TIER_RANGES[tier_name], "tags": tags, "examples": tags[:5]}
+
+        total = sum(details["count"] for details in mix.values())
+        return {
+            "strategy": name,
+            "total_hashtags": str(total),
+            "niche": niche or "general",
+            "mix": mix,
+            "all_tags": [tag for details in mix.values() for tag in details["tags"]],
+            "tip": tip
+        }
+
+
+_default_engine: Optional[HashtagEngine] = None
+_default_lock = threading.Lock()
+
+
+def default_engine() -> HashtagEngine:
+    global _default_engine
+    with _default_lock:
+        if _default_engine is None:
+            _default_engine = HashtagEngine.from_file()
+        return _default_engine
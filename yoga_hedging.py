@@ -0,0 +1,183 @@
+"""
+Hedged Requests
+Hard per-call deadlines plus one hedged duplicate when a call runs past the usual latency
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Awaitable, Callable, Dict, Optional
+
+from yoga_router import ModelRouter, MIN_SAMPLES, default_router, percentile
+
+# Hedge once a call has run longer than this percentile of the model's recent latency
+HEDGE_PERCENTILE = float(os.getenv('YOGAGLOW_HEDGE_PERCENTILE', '90'))
+# Hedges allowed per primary call on average (0 disables hedging, deadlines still apply)
+HEDGE_BUDGET = float(os.getenv('YOGAGLOW_HEDGE_BUDGET', '0.1'))
+HEDGE_BURST = 5
+HEDGE_WORKERS = int(os.getenv('YOGAGLOW_HEDGE_WORKERS', '32'))
+DEFAULT_DEADLINE = 60.0
+MIN_HEDGE_DELAY = 1.0
+
+
+class GenerationTimeout(TimeoutError):
+    """Neither the call nor its hedge answered before the hard deadline"""
+
+
+class HedgeBudget:
+    """Token bucket: each primary call earns `ratio` of a hedge, so hedges stay a bounded share of quota"""
+
+    def __init__(self, ratio: float = HEDGE_BUDGET, burst: int = HEDGE_BURST):
+        self.ratio = ratio
+        self.burst = burst
+        self.tokens = min(1.0, burst) if ratio > 0 else 0.0
+        self.lock = threading.Lock()
+
+    def earn(self):
+        with self.lock:
+            self.tokens = min(self.burst, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self.lock:
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class Hedger:
+    def __init__(self, router: Optional[ModelRouter] = None, percentile: float = HEDGE_PERCENTILE,
+                 budget: Optional[HedgeBudget] = None, workers: int = HEDGE_WORKERS,
+                 slots: Optional[threading.Semaphore] = None):
+        """slots, if given, is held by every attempt run() starts (hedges and abandoned losers too) until it
+        finishes, so it bounds what is really in flight upstream"""
+        self.router = router or default_router()
+        self.slots = slots
+        self.percentile = percentile
+        self.budget = budget or HedgeBudget()
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gemini")
+        self.counts = {"calls": 0, "hedges": 0, "hedge_wins": 0, "timeouts": 0}
+        self.lock = threading.Lock()
+
+    def deadline(self, task: str) -> float:
+        return float(self.router.routes.get(task, {}).get("deadline", DEFAULT_DEADLINE))
+
+    def hedge_delay(self, task: str, model_name: str) -> float:
+        """Observed latency percentile; until there is enough history, the task's p95 SLO"""
+        latencies = self.router.latencies(model_name)
+        if len(latencies) >= MIN_SAMPLES:
+            delay = percentile(latencies, self.percentile)
+        else:
+            delay = float(self.router.routes.get(task, {}).get("p95_slo", DEFAULT_DEADLINE / 2))
+        return max(MIN_HEDGE_DELAY, min(delay, self.deadline(task) / 2))
+
+    def _count(self, key: str):
+        with self.lock:
+            self.counts[key] += 1
+
+    def _holding_slot(self, attempt: Callable[[], str]) -> Callable[[], str]:
+        """attempt(), giving back the slot taken for it once it finishes"""
+        if self.slots is None:
+            return attempt
+
+        def run_and_release() -> str:
+            try:
+                return attempt()
+            finally:
+                self.slots.release()
+        return run_and_release
+
+    def _try_hedge(self) -> bool:
+        """A hedge is in the budget and a slot is free right now (a hedge never queues for one)"""
+        if self.slots is not None and not self.slots.acquire(blocking=False):
+            return False
+        if self.budget.try_spend():
+            return True
+        if self.slots is not None:
+            self.slots.release()
+        return False
+
+    def run(self, task: str, model_name: str, attempt: Callable[[], str]) -> str:
+        """Run attempt() with a hedge and a hard deadline; losers finish in the background, bounded by their own timeout"""
+        deadline = self.deadline(task)
+        if self.slots is not None:
+            self.slots.acquire()  # queue for room before the deadline clock starts
+        started = time.monotonic()
+        self._count("calls")
+        self.budget.earn()
+        attempt = self._holding_slot(attempt)
+
+        futures = [self.pool.submit(attempt)]
+        done, _ = wait(futures, timeout=self.hedge_delay(task, model_name))
+        if not done and self._try_hedge():
+            self._count("hedges")
+            futures.append(self.pool.submit(attempt))
+
+        pending, error = set(futures), None
+        while pending:
+            remaining = deadline - (time.monotonic() - started)
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is not futures[0]:
+                        self._count("hedge_wins")
+                    return future.result()
+                error = future.exception()
+        if error is not None and not pending:
+            raise error
+        self._count("timeouts")
+        raise GenerationTimeout(f"No response from {model_name} within {deadline:.0f}s")
+
+    async def run_async(self, task: str, model_name: str, attempt: Callable[[], Awaitable[str]]) -> str:
+        """Async variant: the losing attempt is cancelled instead of left running"""
+        deadline = self.deadline(task)
+        started = time.monotonic()
+        self._count("calls")
+        self.budget.earn()
+
+        tasks = [asyncio.ensure_future(attempt())]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_delay(task, model_name))
+            if not done and self.budget.try_spend():
+                self._count("hedges")
+                tasks.append(asyncio.ensure_future(attempt()))
+
+            pending, error = set(tasks), None
+            while pending:
+                remaining = deadline - (time.monotonic() - started)
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task_done in done:
+                    if task_done.exception() is None:
+                        if task_done is not tasks[0]:
+                            self._count("hedge_wins")
+                        return task_done.result()
+                    error = task_done.exception()
+            if error is not None and not pending:
+                raise error
+            self._count("timeouts")
+            raise GenerationTimeout(f"No response from {model_name} within {deadline:.0f}s")
+        finally:
+            for pending_task in tasks:
+                pending_task.cancel()
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return dict(self.counts, hedge_tokens=round(self.budget.tokens, 2))
+
+
+_default_hedger: Optional[Hedger] = None
+_default_lock = threading.Lock()
+
+
+def default_hedger() -> Hedger:
+    global _default_hedger
+    with _default_lock:
+        if _default_hedger is None:
+            _default_hedger = Hedger()
+        return _default_hedger
@@ -0,0 +1,96 @@
+"""
+Session History
+Bounded per-session history of generations, stored compressed with only a short preview kept readable
+"""
+
+import os
+import sys
+import time
+import zlib
+from collections import deque
+from typing import Dict
+
+# Prefer zstd when available (faster, smaller); zlib is always there
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+HISTORY_SIZE = int(os.getenv('YOGAGLOW_SESSION_HISTORY', '20'))
+PREVIEW_CHARS = 120
+
+
+def compress(text: str) -> tuple:
+    data = text.encode("utf-8")
+    if zstandard is not None:
+        # Contexts aren't thread-safe and sessions run on different threads, so one per call
+        return "zstd", zstandard.ZstdCompressor(level=6).compress(data)
+    return "zlib", zlib.compress(data, 6)
+
+
+def decompress(codec: str, blob: bytes) -> str:
+    if codec == "zstd":
+        return zstandard.ZstdDecompressor().decompress(blob).decode("utf-8")
+    return zlib.decompress(blob).decode("utf-8")
+
+
+def make_preview(text: str, limit: int = PREVIEW_CHARS) -> str:
+    flat = " ".join(text.replace("*", "").replace("#", "").split())
+    return flat if len(flat) <= limit else flat[:limit - 1].rstrip() + "…"
+
+
+class HistoryEntry:
+    __slots__ = ("kind", "topic", "created_at", "preview", "codec", "blob", "raw_bytes")
+
+    def __init__(self, kind: str, topic: str, content: str):
+        self.kind = kind
+        self.topic = topic
+        self.created_at = time.time()
+        self.preview = make_preview(content)
+        self.codec, self.blob = compress(content)
+        self.raw_bytes = len(content.encode("utf-8"))
+
+    def content(self) -> str:
+        return decompress(self.codec, self.blob)
+
+
+class SessionHistory:
+    """Ring buffer: once full, each new generation evicts the oldest"""
+
+    def __init__(self, max_entries: int = HISTORY_SIZE):
+        self.entries: deque = deque(maxlen=max_entries)
+
+    def add(self, kind: str, topic: str, content: str):
+        self.entries.appendleft(HistoryEntry(kind, topic, content))
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def get(self, index: int) -> str:
+        """Full text of an entry (newest first), decompressed on demand"""
+        return self.entries[index].content()
+
+    def export_markdown(self) -> str:
+        parts = []
+        for entry in self.entries:
+            when = time.strftime('%Y-%m-%d %H:%M', time.localtime(entry.created_at))
+            parts.append(f"## {entry.kind.title()}: {entry.topic} ({when})\n\n{entry.content()}")
+        return "\n\n---\n\n".join(parts)
+
+    def memory_report(self) -> Dict:
+        compressed = sum(len(e.blob) for e in self.entries)
+        raw = sum(e.raw_bytes for e in self.entries)
+        overhead = sys.getsizeof(self.entries) + sum(
+            sys.getsizeof(e) + sys.getsizeof(e.blob) + sys.getsizeof(e.preview) + sys.getsizeof(e.topic) for e in self.entries)
+        return {
+            "entries": len(self.entries),
+            "capacity": self.entries.maxlen,
+            "codec": "zstd" if zstandard is not None else "zlib",
+            "raw_bytes": raw,
+            "compressed_bytes": compressed,
+            "resident_bytes": overhead,
+            "ratio": round(raw / compressed, 1) if compressed else 0.0
+        }
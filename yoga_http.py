@@ -0,0 +1,189 @@
+"""
+Shared HTTP Transport
+One pooled keep-alive session per process for outbound calls, with per-host limits, timeouts and compression
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry, make_headers
+
+import google.generativeai as genai
+from pytrends import exceptions as trends_exceptions
+from pytrends.request import TrendReq, BASE_TRENDS_URL
+
+from yoga_tracing import span, CLIENT
+
+# Hosts kept in the pool, and kept-alive connections per host
+POOL_HOSTS = int(os.getenv('YOGAGLOW_HTTP_POOL_HOSTS', '10'))
+POOL_SIZE = int(os.getenv('YOGAGLOW_HTTP_POOL_SIZE', '16'))
+# Requests in flight to any one host at a time; the rest wait for a slot instead of opening more sockets
+PER_HOST_LIMIT = int(os.getenv('YOGAGLOW_HTTP_PER_HOST', '8'))
+CONNECT_TIMEOUT = float(os.getenv('YOGAGLOW_HTTP_CONNECT_TIMEOUT', '3.05'))
+READ_TIMEOUT = float(os.getenv('YOGAGLOW_HTTP_READ_TIMEOUT', '20'))
+COMPRESSION = os.getenv('YOGAGLOW_HTTP_COMPRESSION', '1') == '1'
+# Base URLs to send Gemini and Trends calls to instead of Google's (e.g. yoga_load_test's stand-in server)
+GEMINI_ENDPOINT = os.getenv('YOGAGLOW_GEMINI_ENDPOINT', '')
+TRENDS_URL = os.getenv('YOGAGLOW_TRENDS_URL', '').rstrip('/')
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) YogaGlow'
+
+TRENDS_COOKIE_TTL = 3600
+# After a cookie fetch that brought no NID (throttled, offline), ask again this soon
+TRENDS_COOKIE_RETRY = 60
+
+
+class PooledSession(requests.Session):
+    """requests.Session with a sized connection pool, default timeouts and a concurrency cap per host"""
+
+    def __init__(self, pool_hosts: int = POOL_HOSTS, pool_size: int = POOL_SIZE, per_host: int = PER_HOST_LIMIT,
+                 timeout: tuple = (CONNECT_TIMEOUT, READ_TIMEOUT), compression: bool = COMPRESSION,
+                 max_retries: Optional[Retry] = None):
+        super().__init__()
+        adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=pool_size, max_retries=max_retries or 0)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+        self.adapter = adapter
+        self.timeout = timeout
+        self.per_host = per_host
+        self.headers["User-Agent"] = USER_AGENT
+        # gzip/deflate always; br and zstd too when urllib3 has the decoders installed
+        self.headers["Accept-Encoding"] = make_headers(accept_encoding=True)["accept-encoding"] if compression else "identity"
+        self.host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self.counts = {"requests": 0, "waited": 0}
+        self.lock = threading.Lock()
+
+    def _slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc
+        with self.lock:
+            if host not in self.host_slots:
+                self.host_slots[host] = threading.BoundedSemaphore(self.per_host)
+            self.counts["requests"] += 1
+            return self.host_slots[host]
+
+    def request(self, method, url, *args, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        slot = self._slot(url)
+        parts = urlsplit(url)
+        with span("http.request", {"http.request.method": method.upper(), "server.address": parts.hostname,
+                                   "url.path": parts.path}, CLIENT) as request_span:
+            if not slot.acquire(blocking=False):
+                with self.lock:
+                    self.counts["waited"] += 1
+                request_span.set("yoga.waited_for_slot", True)
+                slot.acquire()
+            try:
+                response = super().request(method, url, *args, **kwargs)
+                request_span.set("http.response.status_code", response.status_code)
+                return response
+            finally:
+                slot.release()
+
+    def stats(self) -> Dict:
+        pools = self.adapter.poolmanager.pools
+        opened = sum(pools[key].num_connections for key in pools.keys())
+        with self.lock:
+            return dict(self.counts, hosts=len(self.host_slots), connections_opened=opened)
+
+
+_default_session: Optional[PooledSession] = None
+_retrying_sessions: Dict[tuple, PooledSession] = {}
+_default_lock = threading.Lock()
+
+
+def default_session() -> PooledSession:
+    global _default_session
+    with _default_lock:
+        if _default_session is None:
+            _default_session = PooledSession()
+        return _default_session
+
+
+def retrying_session(retries: int, backoff_factor: float) -> PooledSession:
+    """A pooled session (one per setting) retrying connection errors and Trends' error statuses, as pytrends does"""
+    key = (retries, backoff_factor)
+    with _default_lock:
+        if key not in _retrying_sessions:
+            retry = Retry(total=retries, read=retries, connect=retries, backoff_factor=backoff_factor,
+                          status_forcelist=TrendReq.ERROR_CODES, allowed_methods=frozenset(['GET', 'POST']))
+            _retrying_sessions[key] = PooledSession(max_retries=retry)
+        return _retrying_sessions[key]
+
+
+def trends_url(url: str) -> str:
+    """A pytrends URL, moved onto TRENDS_URL when that is set"""
+    if TRENDS_URL and url.startswith(BASE_TRENDS_URL):
+        return TRENDS_URL + url[len(BASE_TRENDS_URL):]
+    return url
+
+
+class PooledTrendReq(TrendReq):
+    """pytrends over the shared session: no new session per request, and the NID cookie is fetched once an hour.
+    retries/backoff_factor work as in TrendReq; proxies don't (the session and cookie are shared by the process)"""
+
+    _cookies: Dict[str, str] = {}
+    _cookies_expire = 0.0
+    _cookie_lock = threading.Lock()
+
+    def __init__(self, hl: str = 'en-US', tz: int = 360, geo: str = '', timeout: Optional[tuple] = None, retries: int = 0,
+                 backoff_factor: float = 0, requests_args: Optional[Dict] = None, session: Optional[requests.Session] = None):
+        if requests_args and 'proxies' in requests_args:
+            raise ValueError("PooledTrendReq can't rotate proxies; use pytrends' TrendReq for that")
+        if session is None:
+            session = retrying_session(retries, backoff_factor) if retries or backoff_factor else default_session()
+        self.session = session
+        super().__init__(hl=hl, tz=tz, geo=geo, timeout=timeout or default_session().timeout, retries=retries,
+                         backoff_factor=backoff_factor, requests_args=requests_args)
+
+    def GetGoogleCookie(self):
+        cls = PooledTrendReq
+        with cls._cookie_lock:
+            now = time.monotonic()
+            if now >= cls._cookies_expire:
+                try:
+                    response = self.session.get(trends_url(f'{BASE_TRENDS_URL}/explore/?geo={self.hl[-2:]}'), timeout=self.timeout)
+                    nid = {name: value for name, value in response.cookies.items() if name == 'NID'}
+                except requests.RequestException:
+                    nid = {}
+                if nid:
+                    cls._cookies = nid
+                    cls._cookies_expire = now + TRENDS_COOKIE_TTL
+                else:
+                    # Keep the last good cookie, if any, and try again soon rather than in an hour
+                    cls._cookies_expire = now + TRENDS_COOKIE_RETRY
+            return dict(cls._cookies)
+
+    def _get_data(self, url, method=TrendReq.GET_METHOD, trim_chars=0, **kwargs):
+        send = self.session.post if method == TrendReq.POST_METHOD else self.session.get
+        response = send(trends_url(url), timeout=self.timeout, cookies=self.cookies, headers=self.headers, **kwargs, **self.requests_args)
+        # Same checks as TrendReq: Google answers JSON under a few content types, behind a junk prefix
+        content_type = response.headers.get('Content-Type', '')
+        if response.status_code == 200 and any(t in content_type for t in ('application/json', 'application/javascript', 'text/javascript')):
+            return json.loads(response.text[trim_chars:])
+        if response.status_code == requests.codes.too_many_requests:
+            raise trends_exceptions.TooManyRequestsError.from_response(response)
+        raise trends_exceptions.ResponseError.from_response(response)
+
+
+_configured_key: Optional[str] = None
+_configure_lock = threading.Lock()
+
+
+def configure_gemini(api_key: str):
+    """genai.configure once per key per process; it rebuilds the SDK's clients, so repeating it on every rerun
+    throws away their open channels"""
+    global _configured_key
+    with _configure_lock:
+        if api_key != _configured_key:
+            if GEMINI_ENDPOINT:
+                # Only the REST transport can talk to a plain-HTTP endpoint
+                genai.configure(api_key=api_key, transport="rest", client_options={"api_endpoint": GEMINI_ENDPOINT})
+            else:
+                genai.configure(api_key=api_key)
+            _configured_key = api_key
@@ -0,0 +1,746 @@
+"""
+YogaGlow Load Test Harness
+Drives concurrent browser-like websocket sessions against a running copy of the app, with Gemini and Trends
+served by a local stand-in server
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+import aiohttp
+from streamlit.proto.Alert_pb2 import Alert
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_SCRIPT = os.path.join(APP_DIR, "yoga_glow_app.py")
+sys.path.insert(0, APP_DIR)
+from yoga_viral_discovery import YogaViralDiscovery
+
+# Defaults
+DEFAULT_RUNS_DIR = "load_test_runs"
+DEFAULT_ACTION_MIX = "tab=55,ideas=15,caption=15,trends=15"
+PERCENTILES = [50, 90, 95, 99]
+# Share of a streamed generation's latency spent before the first chunk; the rest is spread over the chunks
+FIRST_CHUNK_SHARE = 0.3
+STREAM_CHUNK_CHARS = 200
+
+APP_START_TIMEOUT = 60
+# script_finished statuses that mean "another run follows" rather than "the page is done"
+RERUN_PENDING = {ForwardMsg.FINISHED_EARLY_FOR_RERUN}
+
+# Widgets the sessions drive
+SECTION_KEY = "active_section"
+SECTIONS = ["🏠 Dashboard", "💡 Content Ideas", "📅 Weekly Plan", "📈 Growth Guide", "✍️ Caption Helper", "🔍 Trending"]
+TOPIC_KEY = "caption_topic"
+IDEAS_SECTION, CAPTION_SECTION, TRENDING_SECTION = "💡 Content Ideas", "✍️ Caption Helper", "🔍 Trending"
+IDEAS_BUTTON, CAPTION_BUTTON, TRENDS_BUTTON = "✨ Generate Ideas", "✨ Generate Caption", "🔄 Refresh Trends"
+LIMIT_MESSAGE = "reached the limit"
+
+CAPTION_TOPICS = ["Morning stretch for back pain", "Yoga for better sleep", "Desk yoga at lunch", "Hip openers for runners"]
+NICHES = ["morning yoga", "stress relief yoga", "desk yoga", "sleep yoga", "yoga tips", "beginner yoga"]
+
+
+class LatencyProfile:
+    """Latency distribution parsed from a spec such as 'lognormal:0.8:0.4'"""
+
+    def __init__(self, spec: str):
+        self.spec = spec
+        parts = spec.split(":")
+        self.kind = parts[0]
+        try:
+            self.params = [float(p) for p in parts[1:]]
+        except ValueError:
+            raise ValueError(f"Invalid latency spec: {spec}")
+
+        expected = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2, "exponential": 1}
+        if self.kind not in expected or len(self.params) != expected[self.kind]:
+            raise ValueError(f"Invalid latency spec: {spec} (use fixed:S, uniform:LO:HI, normal:MEAN:SD, lognormal:MEDIAN:SIGMA or exponential:MEAN)")
+
+    def sample(self, rng: random.Random) -> float:
+        """Draw one latency in seconds (never negative)"""
+        p = self.params
+        if self.kind == "fixed":
+            value = p[0]
+        elif self.kind == "uniform":
+            value = rng.uniform(p[0], p[1])
+        elif self.kind == "normal":
+            value = rng.gauss(p[0], p[1])
+        elif self.kind == "lognormal":
+            value = p[0] * rng.lognormvariate(0, p[1])
+        else:
+            value = rng.expovariate(1 / p[0]) if p[0] > 0 else 0.0
+        return max(0.0, value)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Fake upstream server
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class FakeUpstreamServer(ThreadingHTTPServer):
+    """Local stand-in for the Gemini (generateContent, streamGenerateContent, cachedContents) and Google Trends
+    endpoints, at the paths the SDK and pytrends use"""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], gemini_latency: LatencyProfile, trends_latency: LatencyProfile,
+                 error_rate: float = 0.0, seed: Optional[int] = None):
+        super().__init__(address, FakeUpstreamHandler)
+        self.gemini_latency = gemini_latency
+        self.trends_latency = trends_latency
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.stats_lock = threading.Lock()
+        self.calls: Dict[str, int] = {}
+        self.throttled: Dict[str, int] = {}
+        self.catalog = [idea for week in range(1, 5) for idea in YogaViralDiscovery().get_content_ideas_for_beginners(week)['ideas']]
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def draw(self, profile: LatencyProfile) -> Tuple[float, bool]:
+        """Pick the latency and 429 decision for one request"""
+        with self.rng_lock:
+            return profile.sample(self.rng), self.rng.random() < self.error_rate
+
+    def randint(self, low: int, high: int) -> int:
+        with self.rng_lock:
+            return self.rng.randint(low, high)
+
+    def record(self, endpoint: str, throttled: bool):
+        with self.stats_lock:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+            if throttled:
+                self.throttled[endpoint] = self.throttled.get(endpoint, 0) + 1
+
+    def snapshot(self) -> Dict:
+        with self.stats_lock:
+            return {"calls": dict(self.calls), "throttled": dict(self.throttled)}
+
+    def reset_stats(self):
+        with self.stats_lock:
+            self.calls.clear()
+            self.throttled.clear()
+
+    def fake_ideas(self, count: int) -> str:
+        """Markdown shaped like a generate_ideas response"""
+        with self.rng_lock:
+            picks = self.rng.sample(self.catalog, min(count, len(self.catalog)))
+        blocks = []
+        for i, idea in enumerate(picks, 1):
+            blocks.append(
+                f"### Idea {i}\n\n"
+                f"🎬 **Title**: {idea['title']}\n"
+                f"🪝 **Hook Script**: \"{idea['hook']}\"\n"
+                f"📝 **Full Script/Steps**:\n{idea['script']}\n"
+                f"⏱️ **Duration**: {idea['duration']}\n"
+                f"📱 **Filming Tips**: {idea['equipment']}\n"
+                f"✨ **Why This Works**: Simple, relatable and easy to save for later.\n"
+                f"#️⃣ **Hashtags**: {' '.join(idea['hashtags'])}\n"
+                f"🌟 **Difficulty**: {idea['difficulty']}\n"
+            )
+        return "\n".join(blocks)
+
+    def fake_caption(self) -> str:
+        """Caption-sized text (~180 words) ending with hashtags"""
+        with self.rng_lock:
+            idea = self.rng.choice(self.catalog)
+        body = " ".join([idea['hook']] + ["Take a slow breath and notice how your body feels today."] * 14)
+        return f"{body} 🧘‍♀️🌿✨\n\nWhat does your practice look like this week?\n\n{' '.join(idea['hashtags'])}"
+
+
+class FakeUpstreamHandler(BaseHTTPRequestHandler):
+    """Serves the handful of upstream routes the app actually uses"""
+
+    server: FakeUpstreamServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass  # keep load test output readable
+
+    def send_body(self, status: int, body: str, content_type: str = "application/json", headers: Optional[Dict] = None):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_stream(self, parts: List[str], gap: float):
+        """A JSON array written element by element (chunked), the way the REST transport streams responses"""
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for i, part in enumerate(parts):
+                if i:
+                    time.sleep(gap)
+                data = (("[" if i == 0 else ",\r\n") + part + ("]" if i == len(parts) - 1 else "")).encode("utf-8")
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # the client had what it needed and closed the stream early
+
+    def send_error_status(self, code: int, status: str, message: str):
+        self.send_body(code, json.dumps({"error": {"code": code, "message": message, "status": status}}))
+
+    def send_throttled(self):
+        self.send_error_status(429, "RESOURCE_EXHAUSTED", "Resource has been exhausted (e.g. check quota).")
+
+    def read_payload(self) -> Dict:
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        if path.startswith("/trends/"):
+            self.read_payload()
+            self.handle_trends(path)
+            return
+        payload = self.read_payload()
+        if path == "/v1beta/cachedContents":
+            # Like the real API for a prefix this small
+            self.server.record("gemini.cachedContents", False)
+            self.send_error_status(400, "INVALID_ARGUMENT", "Cached content is too small.")
+            return
+
+        match = re.match(r"^/v1beta/models/([^:/]+):(generateContent|streamGenerateContent)$", path)
+        if not match:
+            self.send_error_status(404, "NOT_FOUND", "Not found")
+            return
+        model, method = match.groups()
+
+        latency, throttled = self.server.draw(self.server.gemini_latency)
+        streaming = method == "streamGenerateContent"
+        time.sleep(latency * FIRST_CHUNK_SHARE if streaming else latency)
+        self.server.record(f"gemini.{method}", throttled)
+        if throttled:
+            self.send_throttled()
+            return
+
+        texts = [part.get("text", "") for content in payload.get("contents", []) for part in content.get("parts", [])]
+        texts += [part.get("text", "") for part in payload.get("systemInstruction", {}).get("parts", [])]
+        prompt = " ".join(texts)
+        count_match = re.search(r"Generate (\d+) content ideas", prompt)
+        text = self.server.fake_caption() if "caption" in prompt.lower() else self.server.fake_ideas(int(count_match.group(1)) if count_match else 5)
+        prompt_tokens, output_tokens = len(prompt) // 4, len(text) // 4
+        usage = {"promptTokenCount": prompt_tokens, "candidatesTokenCount": output_tokens, "totalTokenCount": prompt_tokens + output_tokens}
+
+        if not streaming:
+            self.send_body(200, json.dumps({
+                "candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": "STOP", "index": 0}],
+                "usageMetadata": usage, "modelVersion": model
+            }))
+            return
+        pieces = [text[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(text), STREAM_CHUNK_CHARS)] or [""]
+        parts = []
+        for i, piece in enumerate(pieces):
+            candidate = {"content": {"parts": [{"text": piece}], "role": "model"}, "index": 0}
+            chunk = {"candidates": [candidate], "modelVersion": model}
+            if i == len(pieces) - 1:
+                candidate["finishReason"] = "STOP"
+                chunk["usageMetadata"] = usage
+            parts.append(json.dumps(chunk))
+        self.send_stream(parts, latency * (1 - FIRST_CHUNK_SHARE) / max(len(parts) - 1, 1))
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/_stats":
+            self.send_body(200, json.dumps(self.server.snapshot()))
+            return
+        self.handle_trends(path)
+
+    def handle_trends(self, path: str):
+        if path.rstrip("/") == "/trends/explore":
+            # pytrends fetches the explore page once for its NID cookie
+            self.server.record("trends.cookie", False)
+            self.send_body(200, "<html></html>", "text/html", {"Set-Cookie": "NID=fake-load-test; Path=/"})
+            return
+        if path not in ("/trends/api/explore", "/trends/api/widgetdata/relatedsearches"):
+            self.send_body(404, "")
+            return
+
+        endpoint = "trends.explore" if path.endswith("explore") else "trends.related_queries"
+        latency, throttled = self.server.draw(self.server.trends_latency)
+        time.sleep(latency)
+        self.server.record(endpoint, throttled)
+        if throttled:
+            self.send_throttled()
+            return
+
+        # Trends responses carry an anti-JSON-hijacking prefix that pytrends strips
+        if endpoint == "trends.explore":
+            query = parse_qs(urlparse(self.path).query)
+            try:
+                keyword = json.loads(query["req"][0])["comparisonItem"][0]["keyword"]
+            except (KeyError, IndexError, ValueError):
+                keyword = ""
+            restriction = {"complexKeywordsRestriction": {"keyword": [{"type": "BROAD", "value": keyword}]}}
+            body = {"widgets": [{"id": "RELATED_QUERIES", "token": "fake-token", "request": {"restriction": restriction}}]}
+            self.send_body(200, ")]}'\n" + json.dumps(body))
+        else:
+            rising = [{"query": f"{niche} {suffix}", "value": self.server.randint(50, 900), "formattedValue": "+%", "link": ""}
+                      for niche in NICHES for suffix in ("routine", "for beginners")]
+            body = {"default": {"rankedList": [{"rankedKeyword": rising[:5]}, {"rankedKeyword": rising}]}}
+            self.send_body(200, ")]}',\n" + json.dumps(body))
+
+
+def start_fake_server(host: str = "127.0.0.1", port: int = 0, **kwargs) -> FakeUpstreamServer:
+    """Start the fake upstream server on a background thread"""
+    server = FakeUpstreamServer((host, port), **kwargs)
+    threading.Thread(target=server.serve_forever, name="fake-upstream", daemon=True).start()
+    return server
+
+
+def app_environment(server_url: str) -> Dict[str, str]:
+    """Settings that send the app's Gemini and Trends calls to the stand-in server"""
+    return {"YOGAGLOW_GEMINI_ENDPOINT": server_url, "YOGAGLOW_TRENDS_URL": f"{server_url}/trends",
+            "GEMINI_API_KEY": "load-test"}
+
+
+def free_port(host: str) -> int:
+    with socket.socket() as probe:
+        probe.bind((host, 0))
+        return probe.getsockname()[1]
+
+
+class AppServer:
+    """`streamlit run yoga_glow_app.py` in a child process, pointed at the stand-in server"""
+
+    def __init__(self, host: str, upstream_url: str, db_path: str):
+        self.host = host
+        self.port = free_port(host)
+        self.log = tempfile.TemporaryFile()
+        env = dict(os.environ, **app_environment(upstream_url), YOGAGLOW_DB_PATH=db_path)
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", APP_SCRIPT, "--server.headless=true", f"--server.address={host}",
+             f"--server.port={self.port}", "--browser.gatherUsageStats=false", "--server.fileWatcherType=none"],
+            cwd=APP_DIR, env=env, stdout=self.log, stderr=subprocess.STDOUT)
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def wait_ready(self, http: aiohttp.ClientSession):
+        deadline = time.monotonic() + APP_START_TIMEOUT
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                break
+            try:
+                async with http.get(f"{self.url}/_stcore/health") as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+        self.log.seek(0)
+        raise RuntimeError(f"The app didn't start:\n{self.log.read().decode('utf-8', 'replace')[-2000:]}")
+
+    def rss_bytes(self) -> int:
+        """The app process's resident memory (Linux /proc); 0 where that isn't available"""
+        try:
+            with open(f"/proc/{self.process.pid}/status", encoding="ascii") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            pass
+        return 0
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self.log.close()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Session simulation
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def parse_action_mix(spec: str) -> Dict[str, float]:
+    """Parse 'tab=55,ideas=15,...' into normalised action weights"""
+    mix = {}
+    for item in spec.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in ("tab", "ideas", "caption", "trends"):
+            raise ValueError(f"Unknown action in mix: {name}")
+        mix[name] = float(weight)
+    total = sum(mix.values())
+    if total <= 0:
+        raise ValueError("Action mix weights must add up to more than zero")
+    return {name: weight / total for name, weight in mix.items()}
+
+
+class PageRun:
+    """What one rerun sent back: the widgets on the page and whether it ended in an error"""
+
+    def __init__(self):
+        self.widgets: Dict[str, object] = {}  # widget key or button label → its proto
+        self.errors: List[str] = []
+        self.exception = False
+
+    def add(self, element):
+        kind = element.WhichOneof("type")
+        if kind == "exception":
+            self.exception = True
+        elif kind == "alert" and element.alert.format == Alert.ERROR:
+            self.errors.append(element.alert.body)
+        elif kind in ("button", "radio", "text_input"):
+            widget = getattr(element, kind)
+            # Widget ids end in the user key when there is one ("$$ID-<hash>-<key>"); buttons here go by label
+            self.widgets[widget.label if kind == "button" else widget.id.rsplit("-", 1)[-1]] = widget
+
+    def outcome(self) -> str:
+        if self.exception:
+            return "exception"
+        if any(LIMIT_MESSAGE in e for e in self.errors):
+            return "limited"
+        return "failed" if self.errors else "ok"
+
+
+class AppSession:
+    """One creator's browser tab: a websocket session that sends reruns with widget changes, like the frontend"""
+
+    def __init__(self, session_id: int, app_url: str, mix: Dict[str, float], think: LatencyProfile, timeout: float,
+                 seed: Optional[float] = None):
+        self.session_id = session_id
+        self.stream_url = app_url.replace("http", "ws", 1).rstrip("/") + "/_stcore/stream"
+        self.mix = mix
+        self.think = think
+        self.timeout = timeout
+        self.rng = random.Random(seed)
+        self.ws: Optional[aiohttp.ClientWebSocketResponse] = None
+        # Widget values the frontend would keep sending, by widget id
+        self.values: Dict[str, WidgetState] = {}
+        self.page = PageRun()
+        self.section = SECTIONS[0]
+        self.samples: List[Tuple[str, float, str]] = []
+
+    async def connect(self, http: aiohttp.ClientSession):
+        self.ws = await http.ws_connect(self.stream_url, protocols=("streamlit",), max_msg_size=0)
+
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+
+    async def _rerun(self, trigger: Optional[WidgetState] = None) -> PageRun:
+        message = BackMsg()
+        message.rerun_script.query_string = ""
+        message.rerun_script.widget_states.widgets.extend(list(self.values.values()) + ([trigger] if trigger else []))
+        await self.ws.send_bytes(message.SerializeToString())
+        page = PageRun()
+        while True:
+            frame = await self.ws.receive()
+            if frame.type != aiohttp.WSMsgType.BINARY:
+                raise ConnectionError(f"websocket closed ({frame.type.name})")
+            forward = ForwardMsg()
+            forward.ParseFromString(frame.data)
+            kind = forward.WhichOneof("type")
+            if kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+                page.add(forward.delta.new_element)
+            elif kind == "script_finished" and forward.script_finished not in RERUN_PENDING:
+                return page
+
+    async def rerun(self, action: str, trigger: Optional[WidgetState] = None):
+        """Send one rerun and time it until the page has finished"""
+        started = time.perf_counter()
+        try:
+            self.page = await asyncio.wait_for(self._rerun(trigger), self.timeout)
+            outcome = self.page.outcome()
+        except (asyncio.TimeoutError, aiohttp.ClientError, ConnectionError) as e:
+            outcome = f"error:{type(e).__name__}"
+        self.samples.append((action, time.perf_counter() - started, outcome))
+
+    def widget_id(self, name: str) -> Optional[str]:
+        widget = self.page.widgets.get(name)
+        return widget.id if widget is not None else None
+
+    def set_value(self, key: str, value: str) -> bool:
+        widget_id = self.widget_id(key)
+        if widget_id is not None:
+            self.values[widget_id] = WidgetState(id=widget_id, string_value=value)
+        return widget_id is not None
+
+    async def click(self, action: str, label: str):
+        widget_id = self.widget_id(label)
+        if widget_id is None:
+            self.samples.append((action, 0.0, "missing"))
+            return
+        await self.rerun(action, WidgetState(id=widget_id, trigger_value=True))
+
+    async def open(self, section: str):
+        """Switch sections the way a click on the nav does (a rerun of its own, counted as a tab action)"""
+        if section != self.section and self.set_value(SECTION_KEY, section):
+            self.section = section
+            await self.rerun("tab")
+
+    async def run(self, http: aiohttp.ClientSession, stop_at: float):
+        try:
+            await self.connect(http)
+            await self.rerun("load")
+            while time.monotonic() < stop_at:
+                action = self.rng.choices(list(self.mix), weights=list(self.mix.values()))[0]
+                await getattr(self, f"do_{action}")()
+                await asyncio.sleep(self.think.sample(self.rng))
+        finally:
+            await self.close()
+
+    async def do_tab(self):
+        await self.open(self.rng.choice([s for s in SECTIONS if s != self.section]))
+
+    async def do_ideas(self):
+        await self.open(IDEAS_SECTION)
+        await self.click("ideas", IDEAS_BUTTON)
+
+    async def do_caption(self):
+        await self.open(CAPTION_SECTION)
+        self.set_value(TOPIC_KEY, self.rng.choice(CAPTION_TOPICS))
+        await self.click("caption", CAPTION_BUTTON)
+
+    async def do_trends(self):
+        await self.open(TRENDING_SECTION)
+        await self.click("trends", TRENDS_BUTTON)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Reporting
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def build_report(sessions: List[AppSession], elapsed: float, upstream: Dict, rss: Tuple[int, int], config: Dict) -> Dict:
+    """Aggregate per-session samples into the saved run report"""
+    by_action: Dict[str, List[Tuple[float, str]]] = {}
+    for session in sessions:
+        for action, latency, outcome in session.samples:
+            by_action.setdefault(action, []).append((latency, outcome))
+
+    actions = {}
+    total = 0
+    for action, samples in sorted(by_action.items()):
+        latencies = sorted(latency for latency, _ in samples)
+        outcomes: Dict[str, int] = {}
+        for _, outcome in samples:
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+        total += len(samples)
+        actions[action] = {
+            "count": len(samples),
+            "outcomes": outcomes,
+            "latency_ms": {f"p{p}": round(percentile(latencies, p) * 1000, 2) for p in PERCENTILES},
+            "max_ms": round(latencies[-1] * 1000, 2)
+        }
+
+    rss_before, rss_after = rss
+    return {
+        "label": config.get("label") or "",
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "config": config,
+        "elapsed_s": round(elapsed, 2),
+        "total_actions": total,
+        "throughput_per_s": round(total / elapsed, 2) if elapsed else 0.0,
+        "actions": actions,
+        "upstream": upstream,
+        "memory": {
+            "app_rss_bytes": rss_after,
+            # What the sessions added to the app server on top of its warmed-up footprint
+            "rss_growth_bytes_per_session": int(max(rss_after - rss_before, 0) / len(sessions)) if sessions else 0
+        }
+    }
+
+
+def print_report(report: Dict):
+    print(f"\n🧘 YogaGlow load test — {report['config']['sessions']} sessions, {report['elapsed_s']}s")
+    print(f"Throughput: {report['throughput_per_s']} actions/s ({report['total_actions']} actions)")
+    print(f"{'action':<10}{'count':>8}{'p50 ms':>10}{'p90 ms':>10}{'p95 ms':>10}{'p99 ms':>10}  outcomes")
+    for action, stats in report["actions"].items():
+        lat = stats["latency_ms"]
+        print(f"{action:<10}{stats['count']:>8}{lat['p50']:>10}{lat['p90']:>10}{lat['p95']:>10}{lat['p99']:>10}  {stats['outcomes']}")
+    print("Upstream calls:", report["upstream"]["calls"], "| 429s:", report["upstream"]["throttled"])
+    memory = report["memory"]
+    print(f"Memory/session: {memory['rss_growth_bytes_per_session']:,} B app RSS growth ({memory['app_rss_bytes']:,} B total)")
+
+
+def load_saved_runs(runs_dir: str) -> List[Dict]:
+    runs = []
+    for path in sorted(glob.glob(os.path.join(runs_dir, "*.json"))):
+        try:
+            with open(path, encoding="utf-8") as f:
+                run = json.load(f)
+            run["_path"] = path
+            runs.append(run)
+        except (OSError, ValueError):
+            continue
+    return runs
+
+
+def compare_runs(current: Dict, baseline: Dict) -> List[str]:
+    """Human-readable deltas of throughput and p95 latency against a saved run"""
+    def delta(new: float, old: float) -> str:
+        if not old:
+            return "n/a"
+        return f"{(new - old) / old * 100:+.1f}%"
+
+    lines = [f"Compared with {os.path.basename(baseline.get('_path', 'baseline'))} ({baseline.get('label') or baseline.get('timestamp')}):",
+             f"  throughput {baseline['throughput_per_s']} → {current['throughput_per_s']} actions/s ({delta(current['throughput_per_s'], baseline['throughput_per_s'])})"]
+    for action, stats in current["actions"].items():
+        old = baseline.get("actions", {}).get(action)
+        if old:
+            new_p95, old_p95 = stats["latency_ms"]["p95"], old["latency_ms"]["p95"]
+            lines.append(f"  {action:<8} p95 {old_p95} → {new_p95} ms ({delta(new_p95, old_p95)})")
+    old_mem = baseline.get("memory", {}).get("rss_growth_bytes_per_session", 0)
+    new_mem = current["memory"]["rss_growth_bytes_per_session"]
+    lines.append(f"  memory/session {old_mem:,} → {new_mem:,} B ({delta(new_mem, old_mem)})")
+    return lines
+
+
+async def drive_sessions(app: AppServer, server: FakeUpstreamServer, sessions: List[AppSession], duration: float) -> Tuple[float, Tuple[int, int]]:
+    """Run the sessions against the app until the duration is up: (elapsed seconds, app RSS before and after)"""
+    async with aiohttp.ClientSession() as http:
+        await app.wait_ready(http)
+        # One untimed page load first: imports and process-wide caches are the server's start-up cost, not a session's
+        warm_up = AppSession(-1, app.url, {}, LatencyProfile("fixed:0"), APP_START_TIMEOUT)
+        await warm_up.connect(http)
+        await warm_up.rerun("load")
+        await warm_up.close()
+        server.reset_stats()
+        rss_before = app.rss_bytes()
+        started = time.monotonic()
+        await asyncio.gather(*(session.run(http, started + duration) for session in sessions))
+        elapsed = time.monotonic() - started
+        return elapsed, (rss_before, app.rss_bytes())
+
+
+def run_load_test(args) -> Dict:
+    """Run one load test: a fresh app server and fake upstream, torn down afterwards"""
+    mix = parse_action_mix(args.mix)
+    think = LatencyProfile(args.think)
+    server = start_fake_server(
+        args.host, 0,
+        gemini_latency=LatencyProfile(args.gemini_latency),
+        trends_latency=LatencyProfile(args.trends_latency),
+        error_rate=args.error_rate,
+        seed=args.seed
+    )
+    # A scratch database unless one is given, so test sessions don't land in the real history
+    app = AppServer(args.host, server.url, args.db or os.path.join(tempfile.mkdtemp(prefix="yogaglow-load-"), "load_test.db"))
+    seed_rng = random.Random(args.seed)
+    sessions = [AppSession(i, app.url, mix, think, args.timeout, seed_rng.random()) for i in range(args.sessions)]
+    try:
+        elapsed, rss = asyncio.run(drive_sessions(app, server, sessions, args.duration))
+    finally:
+        app.stop()
+    upstream = server.snapshot()
+    server.shutdown()
+    config = {key: getattr(args, key) for key in ("label", "sessions", "duration", "mix", "think", "gemini_latency", "trends_latency", "error_rate", "seed")}
+    return build_report(sessions, elapsed, upstream, rss, config)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="YogaGlow multi-session load test of the real app (fully offline)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Run concurrent sessions against the app, backed by a local fake upstream")
+    run.add_argument("--sessions", type=int, default=20, help="Concurrent simulated creators")
+    run.add_argument("--duration", type=float, default=30.0, help="Test length in seconds")
+    run.add_argument("--mix", default=DEFAULT_ACTION_MIX, help="Action weights, e.g. tab=55,ideas=15,caption=15,trends=15")
+    run.add_argument("--think", default="exponential:1.0", help="Pause between a session's actions")
+    run.add_argument("--gemini-latency", default="lognormal:2.5:0.5", help="Gemini generation latency distribution (whole response)")
+    run.add_argument("--trends-latency", default="lognormal:0.6:0.4", help="Trends endpoint latency distribution")
+    run.add_argument("--error-rate", type=float, default=0.02, help="Fraction of upstream calls answered with 429")
+    run.add_argument("--timeout", type=float, default=60.0, help="Longest a single rerun may take")
+    run.add_argument("--seed", type=int, default=None)
+    run.add_argument("--host", default="127.0.0.1")
+    run.add_argument("--label", default="", help="Name stored with the saved run")
+    run.add_argument("--db", default="", help="SQLite file for the sessions' profiles and history (default: a scratch file)")
+    run.add_argument("--runs-dir", default=DEFAULT_RUNS_DIR, help="Where runs are saved and compared")
+    run.add_argument("--no-save", action="store_true", help="Don't save this run")
+    run.add_argument("--compare", nargs="?", const="latest", default=None,
+                     help="Compare against a saved run file (default: the most recent one)")
+
+    serve = sub.add_parser("serve", help="Only run the fake upstream server")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--gemini-latency", default="lognormal:2.5:0.5")
+    serve.add_argument("--trends-latency", default="lognormal:0.6:0.4")
+    serve.add_argument("--error-rate", type=float, default=0.02)
+    serve.add_argument("--seed", type=int, default=None)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        server = FakeUpstreamServer(
+            (args.host, args.port),
+            gemini_latency=LatencyProfile(args.gemini_latency),
+            trends_latency=LatencyProfile(args.trends_latency),
+            error_rate=args.error_rate,
+            seed=args.seed
+        )
+        print(f"Fake Gemini/Trends upstream listening on {server.url} (Ctrl+C to stop)")
+        print("Point a running app at it with:")
+        print("\n".join(f"  export {key}={value}" for key, value in app_environment(server.url).items()))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.shutdown()
+        return
+
+    previous = load_saved_runs(args.runs_dir) if args.compare == "latest" else []
+    report = run_load_test(args)
+    print_report(report)
+
+    if args.compare:
+        baseline = None
+        if args.compare == "latest":
+            baseline = previous[-1] if previous else None
+        elif os.path.exists(args.compare):
+            with open(args.compare, encoding="utf-8") as f:
+                baseline = dict(json.load(f), _path=args.compare)
+        if baseline:
+            print("\n".join(compare_runs(report, baseline)))
+        else:
+            print("No saved run to compare against yet.")
+
+    if not args.no_save:
+        os.makedirs(args.runs_dir, exist_ok=True)
+        suffix = f"_{re.sub(r'[^A-Za-z0-9_-]+', '-', args.label)}" if args.label else ""
+        path = os.path.join(args.runs_dir, f"run_{datetime.now().strftime('%Y%m%d_%H%M%S')}{suffix}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved run to {path}")
+
+
+if __name__ == "__main__":
+    main()
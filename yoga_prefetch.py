@@ -0,0 +1,154 @@
+"""
+Speculative Prefetch
+Generates a user's likely next ideas and captions in the background so clicking Generate is instant
+"""
+
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+PREFETCH_ENABLED = os.getenv('YOGAGLOW_PREFETCH', '0') == '1'
+# Speculative calls allowed per user per hour, and across the process per minute
+PER_USER_BUDGET = int(os.getenv('YOGAGLOW_PREFETCH_PER_USER', '3'))
+GLOBAL_BUDGET_PER_MINUTE = int(os.getenv('YOGAGLOW_PREFETCH_PER_MINUTE', '10'))
+RESPONSE_TTL = 1800
+RESPONSE_CACHE_SIZE = 500
+QUEUE_SIZE = 50
+IDLE_POLL_SECONDS = 0.5
+
+
+def ideas_key(user_id: str, sub_niche: str, user_profile: Dict, count: int) -> tuple:
+    return ("ideas", user_id, sub_niche.strip().lower(), user_profile.get('followers'), user_profile.get('lifestyle'), count)
+
+
+def caption_key(user_id: str, topic: str, mood: str, content_type: str) -> tuple:
+    return ("caption", user_id, topic.strip().lower(), mood, content_type)
+
+
+class ResponseCache:
+    """Single-use LRU of ready responses: a prefetched answer is handed out once, then regenerated"""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE, ttl: float = RESPONSE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def put(self, key: tuple, value: str):
+        with self.lock:
+            self.entries[key] = (time.monotonic(), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def take(self, key: tuple) -> Optional[str]:
+        with self.lock:
+            entry = self.entries.pop(key, None)
+        if entry and time.monotonic() - entry[0] < self.ttl:
+            return entry[1]
+        return None
+
+    def __contains__(self, key: tuple) -> bool:
+        with self.lock:
+            return key in self.entries
+
+
+class Prefetcher:
+    """One background worker that only runs speculative jobs while no real generation is in flight"""
+
+    def __init__(self, per_user: int = PER_USER_BUDGET, per_minute: int = GLOBAL_BUDGET_PER_MINUTE):
+        self.per_user = per_user
+        self.per_minute = per_minute
+        self.cache = ResponseCache()
+        self.jobs: "queue.Queue[tuple]" = queue.Queue(maxsize=QUEUE_SIZE)
+        self.queued: set = set()
+        self.user_calls: Dict[str, deque] = {}
+        self.global_calls: deque = deque()
+        self.foreground_active = 0
+        self.counts = {"queued": 0, "run": 0, "hits": 0, "misses": 0, "skipped": 0, "failed": 0}
+        self.lock = threading.Lock()
+        self.worker = threading.Thread(target=self._work, name="prefetch", daemon=True)
+        self.worker.start()
+
+    @contextmanager
+    def foreground(self):
+        """Wrap real user requests; speculation waits while any are running"""
+        with self.lock:
+            self.foreground_active += 1
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.foreground_active -= 1
+
+    def _within_budget(self, user_id: str, pending: int = 0) -> bool:
+        """Room for one more call, counting the user's pending calls: queued but not yet run"""
+        now = time.monotonic()
+        user_calls = self.user_calls.setdefault(user_id, deque())
+        while user_calls and now - user_calls[0] > 3600:
+            user_calls.popleft()
+        while self.global_calls and now - self.global_calls[0] > 60:
+            self.global_calls.popleft()
+        return len(user_calls) + pending < self.per_user and len(self.global_calls) < self.per_minute
+
+    def submit(self, key: tuple, generate: Callable[[], str]) -> bool:
+        """Queue a speculative generation unless it is already cached, queued or over budget. Queued jobs hold
+        their budget, so submit the likeliest first: once the user's budget is spoken for, the rest are skipped"""
+        user_id = key[1]
+        with self.lock:
+            pending = sum(1 for queued in self.queued if queued[1] == user_id)
+            if key in self.queued or key in self.cache or not self._within_budget(user_id, pending):
+                self.counts["skipped"] += 1
+                return False
+            self.queued.add(key)
+        try:
+            self.jobs.put_nowait((key, generate))
+        except queue.Full:
+            with self.lock:
+                self.queued.discard(key)
+                self.counts["skipped"] += 1
+            return False
+        with self.lock:
+            self.counts["queued"] += 1
+        return True
+
+    def take(self, key: tuple) -> Optional[str]:
+        value = self.cache.take(key)
+        with self.lock:
+            self.counts["hits" if value is not None else "misses"] += 1
+        return value
+
+    def _work(self):
+        while True:
+            key, generate = self.jobs.get()
+            # Real requests first: wait for the foreground to go idle
+            while self.foreground_active:
+                time.sleep(IDLE_POLL_SECONDS)
+            with self.lock:
+                allowed = self._within_budget(key[1])
+                if allowed:
+                    now = time.monotonic()
+                    self.user_calls[key[1]].append(now)
+                    self.global_calls.append(now)
+            try:
+                if allowed:
+                    self.cache.put(key, generate())
+                    with self.lock:
+                        self.counts["run"] += 1
+                else:
+                    with self.lock:
+                        self.counts["skipped"] += 1
+            except Exception:
+                with self.lock:
+                    self.counts["failed"] += 1
+            finally:
+                with self.lock:
+                    self.queued.discard(key)
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return dict(self.counts, pending=self.jobs.qsize())
@@ -0,0 +1,159 @@
+"""
+Prompt Prefix Cache
+Registers the stable instruction prefix of each prompt once and reuses it across calls and sessions
+"""
+
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import Future
+from datetime import timedelta
+from typing import Dict, Optional, Tuple
+
+import google.generativeai as genai
+
+from yoga_http import configure_gemini
+
+# gemini = provider context caching, local = in-process stand-in, off = send full prompts
+PROMPT_CACHE_MODE = os.getenv('YOGAGLOW_PROMPT_CACHE', 'gemini')
+CACHE_TTL_SECONDS = int(os.getenv('YOGAGLOW_PROMPT_CACHE_TTL', '3600'))
+REFRESH_MARGIN_SECONDS = 120
+# Don't retry a prefix the provider rejected for this long
+REJECT_BACKOFF_SECONDS = 3600
+# Smallest prefix (in tokens) the provider will cache, per model; shorter ones aren't even tried
+MIN_CACHE_TOKENS = {"gemini-2.5-pro": 4096}
+DEFAULT_MIN_CACHE_TOKENS = int(os.getenv('YOGAGLOW_PROMPT_CACHE_MIN_TOKENS', '1024'))
+
+
+def prefix_key(model_name: str, prefix: str) -> str:
+    return f"{model_name}:{hashlib.sha256(prefix.encode('utf-8')).hexdigest()[:16]}"
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class PrefixCache:
+    """Base: hands out a model for (model, prefix) and counts how often a cached prefix was reused"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # key → (model, whether the prefix is really cached)
+        self.models: Dict[Tuple[str, str], Tuple[object, bool]] = {}
+        self.pending: Dict[Tuple[str, str], Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.uncached = 0
+        self.prefix_tokens_reused = 0
+
+    def model_for(self, api_key: str, model_name: str, prefix: str):
+        key = (api_key, prefix_key(model_name, prefix))
+        with self.lock:
+            entry = self.models.get(key)
+            if entry is not None and self._fresh(key):
+                return self._serve(entry, prefix)
+            future = self.pending.get(key)
+            owner = future is None
+            if owner:
+                # Register outside the lock (it may be a network call); callers for the same key wait on this
+                future = self.pending[key] = Future()
+                self.misses += 1
+        if not owner:
+            future.result()
+            with self.lock:
+                return self._serve(self.models[key], prefix)
+        try:
+            model, cached = self._register(key, model_name, prefix)
+        except BaseException as e:
+            with self.lock:
+                del self.pending[key]
+            future.set_exception(e)
+            raise
+        with self.lock:
+            self.models[key] = (model, cached)
+            del self.pending[key]
+        future.set_result(model)
+        return model
+
+    def _serve(self, entry: Tuple[object, bool], prefix: str):
+        """Count a reuse (only a prefix that is really cached is a hit); call with the lock held"""
+        model, cached = entry
+        if cached:
+            self.hits += 1
+            self.prefix_tokens_reused += estimate_tokens(prefix)
+        else:
+            self.uncached += 1
+        return model
+
+    def _fresh(self, key) -> bool:
+        return True
+
+    def _register(self, key, model_name: str, prefix: str) -> Tuple[object, bool]:
+        # The prefix travels as the system instruction, so the per-call request is only the variable suffix
+        return genai.GenerativeModel(model_name, system_instruction=prefix), False
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return {"mode": type(self).__name__, "prefixes": len(self.models),
+                    "cached_prefixes": sum(cached for _, cached in self.models.values()), "hits": self.hits,
+                    "misses": self.misses, "uncached": self.uncached, "prefix_tokens_reused": self.prefix_tokens_reused}
+
+
+class LocalPrefixCache(PrefixCache):
+    """Stand-in for tests and offline runs: no provider-side cache, but every prefix counts as cached"""
+
+    def _register(self, key, model_name: str, prefix: str) -> Tuple[object, bool]:
+        return super()._register(key, model_name, prefix)[0], True
+
+
+class GeminiContextCache(PrefixCache):
+    """Provider context caching: the prefix is uploaded once and billed at the cached-token rate"""
+
+    def __init__(self, ttl_seconds: int = CACHE_TTL_SECONDS):
+        super().__init__()
+        self.ttl_seconds = ttl_seconds
+        self.expires: Dict[Tuple[str, str], float] = {}
+
+    def _fresh(self, key) -> bool:
+        return time.monotonic() < self.expires.get(key, 0)
+
+    def _expire_in(self, key, seconds: float):
+        with self.lock:
+            self.expires[key] = time.monotonic() + seconds
+
+    def _register(self, key, model_name: str, prefix: str) -> Tuple[object, bool]:
+        if estimate_tokens(prefix) < MIN_CACHE_TOKENS.get(model_name, DEFAULT_MIN_CACHE_TOKENS):
+            # The provider would reject it: send it as the system instruction for good
+            # (implicit caching still applies)
+            self._expire_in(key, float("inf"))
+            return super()._register(key, model_name, prefix)
+        try:
+            configure_gemini(key[0])
+            cached = genai.caching.CachedContent.create(
+                model=f"models/{model_name}",
+                display_name=f"yogaglow-{key[1].replace(':', '-').replace('.', '-')}",
+                system_instruction=prefix,
+                ttl=timedelta(seconds=self.ttl_seconds)
+            )
+            self._expire_in(key, self.ttl_seconds - REFRESH_MARGIN_SECONDS)
+            return genai.GenerativeModel.from_cached_content(cached), True
+        except Exception:
+            # Unsupported model or a provider error: keep the split prompt for a while, then try again
+            self._expire_in(key, REJECT_BACKOFF_SECONDS)
+            return super()._register(key, model_name, prefix)
+
+
+_default_cache: Optional[PrefixCache] = None
+_default_lock = threading.Lock()
+
+
+def default_prefix_cache() -> Optional[PrefixCache]:
+    """The process-wide cache for the configured mode (None when caching is off)"""
+    global _default_cache
+    if PROMPT_CACHE_MODE == "off":
+        return None
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = LocalPrefixCache() if PROMPT_CACHE_MODE == "local" else GeminiContextCache()
+        return _default_cache
@@ -0,0 +1,188 @@
+"""
+YogaGlow HTML Render Layer
+Builds each static section's card markup once per (section, inputs) and memoizes it
+"""
+
+import html as html_lib
+import os
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Callable, Dict, List, Hashable
+
+from yoga_tracing import span
+
+# Shared by every session in the process; oldest fragments are evicted first
+HTML_CACHE_SIZE = int(os.getenv('YOGAGLOW_HTML_CACHE_SIZE', '256'))
+
+
+class HtmlFragmentCache:
+    """Thread-safe LRU of rendered HTML keyed by (section, inputs)"""
+
+    def __init__(self, maxsize: int = HTML_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._items: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, section: str, inputs: tuple, build: Callable[[], str]) -> str:
+        key = (section, inputs)
+        with span("render.html", {"yoga.section": section}) as render_span:
+            with self._lock:
+                if key in self._items:
+                    self._items.move_to_end(key)
+                    self.hits += 1
+                    render_span.set("yoga.cache", "hit")
+                    return self._items[key]
+                self.misses += 1
+            render_span.set("yoga.cache", "miss")
+
+            # Build outside the lock; two sessions racing on a miss just build the same string twice
+            html = build()
+            render_span.set("yoga.html_bytes", len(html))
+            with self._lock:
+                self._items[key] = html
+                self._items.move_to_end(key)
+                while len(self._items) > self.maxsize:
+                    self._items.popitem(last=False)
+            return html
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"size": len(self._items), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+_fragment_cache = HtmlFragmentCache()
+
+
+def cached_html(section: str, inputs: tuple, build: Callable[[], str]) -> str:
+    """Return the memoized HTML for a section, building it on first use"""
+    return _fragment_cache.get_or_build(section, inputs, build)
+
+
+def html_cache_stats() -> Dict:
+    return _fragment_cache.stats()
+
+
+def esc(value) -> str:
+    return html_lib.escape(str(value))
+
+
+def format_date(iso_date: str) -> str:
+    """'2025-03-07' → 'Mar 7, 2025'"""
+    d = date.fromisoformat(iso_date)
+    return f"{d:%b} {d.day}, {d.year}"
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Section builders
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def metric_card(number: str, label: str, aria_label: str = "") -> str:
+    aria = f' aria-label="{esc(aria_label)}"' if aria_label else ''
+    return f'<div class="metric-glow" role="status"{aria}><div class="metric-number">{esc(number)}</div><div class="metric-label">{esc(label)}</div></div>'
+
+
+def metric_row_html(metrics: List[tuple]) -> str:
+    """A row of metric cards given (number, label, aria_label) tuples"""
+    return '<div class="card-grid">' + ''.join(metric_card(*m) for m in metrics) + '</div>'
+
+
+def hashtag_pills_html(tags: List[str]) -> str:
+    return '<div class="hashtag-container">' + ''.join(f'<span class="hashtag-pill">{esc(tag)}</span>' for tag in tags) + '</div>'
+
+
+def todays_focus_html(day_name: str, today_schedule: Dict) -> str:
+    if today_schedule and today_schedule.get('type') != 'Rest':
+        todo = (f'<div class="glow-card" role="article" aria-label="Today\'s content to-do"><h4>📱 Content To-Do ({esc(day_name)})</h4>'
+                f'<ul><li><strong>{esc(today_schedule["type"])}</strong> at {esc(today_schedule["time"])}</li><li>{esc(today_schedule["note"])}</li>'
+                f'<li>Add 2-3 Stories</li><li>Reply to comments within 1 hour</li></ul></div>')
+    else:
+        todo = (f'<div class="glow-card" role="article" aria-label="Rest day"><h4>🌿 Rest & Recharge ({esc(day_name)})</h4>'
+                f'<p>Today is your rest day! Use this time to plan and batch-film content for next week.</p></div>')
+    engagement = ('<div class="glow-card" role="article" aria-label="Daily engagement tasks"><h4>💬 Engagement (30 min)</h4>'
+                  '<ul><li>Comment on 10 yoga accounts</li><li>Engage with 10 potential students</li><li>Connect with 10 similar creators</li></ul></div>')
+    return f'<div class="card-grid card-grid-2">{todo}{engagement}</div>'
+
+
+def content_pillars_html(pillars: List[str]) -> str:
+    bars = []
+    for pillar in pillars:
+        pct = pillar.split('(')[1].split('%')[0] if '(' in pillar else '25'
+        bars.append(f'<div class="pillar-bar"><div class="pillar-fill" style="width:{esc(pct)}%;"></div><span>{esc(pillar)}</span></div>')
+    return ''.join(bars)
+
+
+def week_plan_html(week_data: Dict) -> str:
+    """Theme card plus every idea card for one week of the content journey"""
+    parts = [f'<div class="week-card"><h3>Theme: {esc(week_data["theme"])}</h3><p>{esc(week_data["focus"])}</p></div>']
+    for idea in week_data['ideas']:
+        script = esc(idea['script']).replace('\n', '<br>')
+        parts.append(
+            f'<div class="idea-card" role="article" aria-label="{esc(idea["title"])}">'
+            f'<div class="idea-title">{esc(idea["title"])}</div>'
+            f'<div class="idea-hook">🪝 "{esc(idea["hook"])}"</div>'
+            f'<div class="idea-details"><div><p><strong>Script:</strong><br>{script}</p>'
+            f'<p><strong>Equipment:</strong> {esc(idea["equipment"])} • <strong>Duration:</strong> {esc(idea["duration"])} • <strong>Best Time:</strong> {esc(idea["best_time"])}</p></div>'
+            f'{hashtag_pills_html(idea["hashtags"])}</div></div>'
+        )
+    return ''.join(parts)
+
+
+def posting_schedule_html(sched: Dict) -> str:
+    """Summary line and one card per day of a posting schedule"""
+    parts = [f'<p><strong>{esc(sched["name"])}</strong> — {esc(sched["posts_per_week"])} posts/week · '
+             f'{esc(sched.get("reels_per_week", 0))} reels/week · {esc(sched.get("stories_per_day", "1-2"))} stories/day</p>']
+    for day, info in sched.get('schedule', {}).items():
+        type_emoji = "🎬" if info['type'] == 'Reel' else "📸" if info['type'] == 'Story' else "🌿"
+        parts.append(f'<div class="schedule-day-card"><span class="day-name">{esc(day)}</span> <span class="day-type">{type_emoji} {esc(info["type"])}</span><br>'
+                     f'<span class="day-time">{esc(info["time"])}</span> · <span class="day-note">{esc(info["note"])}</span></div>')
+    if sched.get('best_slots'):
+        source = f"from {sched['data_points']:,} posts" if sched.get('data_points') else "typical Instagram patterns"
+        slots = " · ".join(f"{s['day'][:3]} {s['time']} ({s['lift']}×)" for s in sched['best_slots'][:3])
+        parts.append(f'<p><small>📈 Best slots for you ({esc(source)}): {esc(slots)}</small></p>')
+    return ''.join(parts)
+
+
+def milestones_html(milestones: Dict, followers: int) -> str:
+    """'Currently at' card followed by every milestone card, coloured by progress"""
+    parts = [f'<div class="glow-card text-center"><h3>Currently At</h3><div class="metric-number">{followers:,} followers</div></div>']
+    next_target_val = next((x['target'] for x in milestones['milestones'] if x['target'] > followers), 0)
+    for m in milestones['milestones']:
+        achieved = followers >= m['target']
+        is_next = m['target'] == next_target_val
+        css_class = "milestone-achieved" if achieved else "milestone-next" if is_next else "milestone-future"
+        status = "✅" if achieved else "🎯" if is_next else "🏆"
+        forecast = m.get('forecast') or {}
+        likely = (f'<br><small>Most likely around {esc(format_date(forecast["p50"]))} '
+                  f'(80% between {esc(format_date(forecast["p10"]))} and {esc(format_date(forecast["p90"]))})</small>'
+                  if not achieved and forecast.get('p90') else "")
+        parts.append(f'<div class="milestone-card {css_class}" role="listitem"><span class="milestone-target">{status} {m["target"]:,}</span> followers<br>'
+                     f'<strong>Timeline:</strong> {esc(m["timeframe"])}{likely}<br>{esc(m["celebration"])}<br><em>Unlocks: {esc(m["unlock"])}</em></div>')
+    return ''.join(parts)
+
+
+def hashtag_strategy_html(strategy: Dict) -> str:
+    """Strategy summary card plus one card per hashtag tier"""
+    parts = [f'<div class="strategy-card"><div class="strategy-title">{esc(strategy["strategy"])}</div>'
+             f'<div class="strategy-detail">Use <strong>{esc(strategy["total_hashtags"])}</strong> hashtags per post</div></div>']
+    for category, details in strategy['mix'].items():
+        label = category.replace('_', ' ').title()
+        tags = details.get('tags') or details.get('examples', [])
+        parts.append(f'<div class="glow-card"><h4>{esc(label)} ({esc(details.get("count", "?"))} tags)</h4><p>{esc(details.get("range", ""))}</p>'
+                     f'{hashtag_pills_html(tags) if tags else ""}</div>')
+    return ''.join(parts)
+
+
+def engagement_tactics_html(tactics: List[Dict]) -> str:
+    parts = []
+    for t in tactics:
+        impact_color = "#10B981" if "Very High" in t['impact'] else "#F59E0B" if "High" in t['impact'] else "#B0BEC5"
+        parts.append(f'<div class="glow-card" role="article"><h4>{esc(t["tactic"])}</h4><p>{esc(t["description"])}</p>'
+                     f'<small>⏱️ {esc(t["time"])} | <span style="color:{impact_color};">Impact: {esc(t["impact"])}</span></small></div>')
+    return ''.join(parts)
@@ -0,0 +1,137 @@
+"""
+Model Router
+Picks a Gemini model per task type and shifts traffic to faster models when latency or errors breach the SLO
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import List, Dict, Optional
+
+# Preferred model first; later entries are faster fallbacks. deadline is the hard per-call limit (seconds)
+DEFAULT_ROUTES = {
+    "ideas": {"models": ["gemini-2.5-pro", "gemini-2.5-flash"], "p95_slo": 30.0, "max_error_rate": 0.2, "deadline": 60.0},
+    "captions": {"models": ["gemini-2.5-flash", "gemini-2.5-flash-lite"], "p95_slo": 6.0, "max_error_rate": 0.2, "deadline": 20.0},
+    "analysis": {"models": ["gemini-2.5-pro", "gemini-2.5-flash"], "p95_slo": 40.0, "max_error_rate": 0.2, "deadline": 90.0},
+}
+# Optional JSON file with the same shape; entries override the defaults per task
+ROUTES_FILE = os.getenv('YOGAGLOW_MODEL_ROUTES', '')
+
+WINDOW_SECONDS = 300
+WINDOW_SIZE = 100
+MIN_SAMPLES = 5
+
+
+def load_routes(path: str = ROUTES_FILE) -> Dict[str, Dict]:
+    routes = {task: dict(route) for task, route in DEFAULT_ROUTES.items()}
+    if path:
+        with open(path, encoding="utf-8") as f:
+            for task, route in json.load(f).items():
+                routes[task] = {**routes.get(task, DEFAULT_ROUTES["ideas"]), **route}
+    return routes
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))]
+
+
+class ModelStats:
+    """Rolling window of recent calls for one model; old samples age out so a recovered model gets traffic back"""
+
+    def __init__(self, window_seconds: float = WINDOW_SECONDS, window_size: int = WINDOW_SIZE):
+        self.window_seconds = window_seconds
+        self.samples: deque = deque(maxlen=window_size)
+
+    def record(self, latency: float, ok: bool):
+        self.samples.append((time.monotonic(), latency, ok))
+
+    def recent(self) -> List[tuple]:
+        cutoff = time.monotonic() - self.window_seconds
+        while self.samples and self.samples[0][0] < cutoff:
+            self.samples.popleft()
+        return list(self.samples)
+
+    def summary(self) -> Dict:
+        samples = self.recent()
+        latencies = [s[1] for s in samples if s[2]]
+        errors = sum(1 for s in samples if not s[2])
+        return {
+            "samples": len(samples),
+            "p50": round(percentile(latencies, 50), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "error_rate": round(errors / len(samples), 3) if samples else 0.0
+        }
+
+
+class ModelRouter:
+    """Shared per process: every generator records into the same stats"""
+
+    def __init__(self, routes: Optional[Dict[str, Dict]] = None):
+        self.routes = routes or load_routes()
+        self.stats: Dict[str, ModelStats] = {}
+        self.lock = threading.Lock()
+
+    def _stats(self, model_name: str) -> ModelStats:
+        if model_name not in self.stats:
+            self.stats[model_name] = ModelStats()
+        return self.stats[model_name]
+
+    def healthy(self, task: str, model_name: str) -> bool:
+        route = self.routes[task]
+        summary = self._stats(model_name).summary()
+        if summary["samples"] < MIN_SAMPLES:
+            return True  # not enough evidence against it
+        return summary["p95"] <= route["p95_slo"] and summary["error_rate"] <= route["max_error_rate"]
+
+    def choose(self, task: str) -> str:
+        """First healthy model in preference order; if none is, the one with the lowest p95"""
+        models = self.routes[task]["models"]
+        with self.lock:
+            for model_name in models:
+                if self.healthy(task, model_name):
+                    return model_name
+            return min(models, key=lambda m: (self._stats(m).summary()["error_rate"] > self.routes[task]["max_error_rate"],
+                                              self._stats(m).summary()["p95"]))
+
+    def record(self, model_name: str, latency: float, ok: bool):
+        with self.lock:
+            self._stats(model_name).record(latency, ok)
+
+    def latencies(self, model_name: str) -> List[float]:
+        """Recent successful call latencies for one model"""
+        with self.lock:
+            return [s[1] for s in self._stats(model_name).recent() if s[2]]
+
+    @contextmanager
+    def timed(self, model_name: str):
+        started = time.monotonic()
+        try:
+            yield
+        except Exception:
+            # Cancellation (a hedge that lost the race) is not the model's fault, so it isn't recorded
+            self.record(model_name, time.monotonic() - started, ok=False)
+            raise
+        self.record(model_name, time.monotonic() - started, ok=True)
+
+    def snapshot(self) -> Dict:
+        with self.lock:
+            return {model_name: stats.summary() for model_name, stats in self.stats.items()}
+
+
+_default_router: Optional[ModelRouter] = None
+_default_lock = threading.Lock()
+
+
+def default_router() -> ModelRouter:
+    global _default_router
+    with _default_lock:
+        if _default_router is None:
+            _default_router = ModelRouter()
+        return _default_router
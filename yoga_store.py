@@ -0,0 +1,214 @@
+"""
+YogaGlow Profile Store
+SQLite (WAL) persistence for creator profiles, saved custom tags, generation history and the idea dedupe index
+"""
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import List, Dict, Optional
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.getenv('YOGAGLOW_DB_PATH', os.path.join(APP_DIR, "data", "yoga_glow.db"))
+POOL_SIZE = int(os.getenv('YOGAGLOW_DB_POOL_SIZE', '4'))
+# Replicas sharing the file see each other's writes once this expires
+READ_CACHE_TTL = float(os.getenv('YOGAGLOW_DB_CACHE_TTL', '30'))
+# Cached reads kept per process (least recently used go first)
+READ_CACHE_SIZE = int(os.getenv('YOGAGLOW_DB_CACHE_SIZE', '2000'))
+HISTORY_LIMIT = 50
+MAX_TAGS = 100
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    user_id TEXT PRIMARY KEY,
+    profile TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS custom_tags (
+    user_id TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (user_id, tag)
+);
+CREATE TABLE IF NOT EXISTS generations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS generations_by_user ON generations (user_id, created_at DESC);
+CREATE TABLE IF NOT EXISTS ideas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    owner TEXT NOT NULL,
+    title TEXT NOT NULL,
+    signature BLOB NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS idea_buckets (
+    owner TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    idea_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idea_buckets_lookup ON idea_buckets (owner, bucket);
+"""
+
+
+class ProfileStore:
+    """A small connection pool over one SQLite file, with a bounded TTL cache for reads on the rerun path"""
+
+    def __init__(self, path: str = DB_PATH, pool_size: int = POOL_SIZE, cache_ttl: float = READ_CACHE_TTL,
+                 cache_size: int = READ_CACHE_SIZE):
+        self.path = path
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self.cache_lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self.pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        for _ in range(max(1, pool_size)):
+            self.pool.put(self._connect())
+        with self.connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Connections move between Streamlit's script threads, one borrower at a time
+        conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")  # readers never block the writer (or other replicas)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        conn = self.pool.get()
+        try:
+            yield conn
+        finally:
+            self.pool.put(conn)
+
+    def _cached(self, key: tuple, load):
+        now = time.monotonic()
+        with self.cache_lock:
+            hit = self.cache.get(key)
+            if hit and now - hit[0] < self.cache_ttl:
+                self.cache.move_to_end(key)
+                return hit[1]
+        value = load()
+        with self.cache_lock:
+            self.cache[key] = (now, value)
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return value
+
+    def _invalidate(self, key: tuple):
+        """Drop the key and any longer key starting with it (e.g. every cached page of a user's history)"""
+        with self.cache_lock:
+            for cached in [k for k in self.cache if k[:len(key)] == key]:
+                del self.cache[cached]
+
+    # ── Profiles ──────────────────────────────────────────────────────────────
+
+    def get_profile(self, user_id: str) -> Optional[Dict]:
+        def load():
+            with self.connection() as conn:
+                row = conn.execute("SELECT profile FROM profiles WHERE user_id = ?", (user_id,)).fetchone()
+            return json.loads(row[0]) if row else None
+        profile = self._cached(("profile", user_id), load)
+        return dict(profile) if profile else None
+
+    def save_profile(self, user_id: str, profile: Dict):
+        with self.connection() as conn:
+            conn.execute(
+                "INSERT INTO profiles (user_id, profile, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET profile = excluded.profile, updated_at = excluded.updated_at",
+                (user_id, json.dumps(profile), time.time()))
+        self._invalidate(("profile", user_id))
+
+    # ── Custom tags ───────────────────────────────────────────────────────────
+
+    def get_custom_tags(self, user_id: str) -> List[str]:
+        def load():
+            with self.connection() as conn:
+                return [row[0] for row in conn.execute("SELECT tag FROM custom_tags WHERE user_id = ? ORDER BY position", (user_id,))]
+        return list(self._cached(("tags", user_id), load))
+
+    def save_custom_tags(self, user_id: str, tags: List[str]):
+        tags = list(dict.fromkeys(tags))[:MAX_TAGS]
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM custom_tags WHERE user_id = ?", (user_id,))
+                conn.executemany("INSERT INTO custom_tags (user_id, tag, position) VALUES (?, ?, ?)",
+                                 [(user_id, tag, i) for i, tag in enumerate(tags)])
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        self._invalidate(("tags", user_id))
+
+    # ── Generation history ────────────────────────────────────────────────────
+
+    def add_generation(self, user_id: str, kind: str, topic: str, content: str):
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("INSERT INTO generations (user_id, kind, topic, content, created_at) VALUES (?, ?, ?, ?, ?)",
+                             (user_id, kind, topic, content, time.time()))
+                # Keep only the newest entries per user
+                conn.execute("DELETE FROM generations WHERE user_id = ? AND id NOT IN "
+                             "(SELECT id FROM generations WHERE user_id = ? ORDER BY created_at DESC LIMIT ?)",
+                             (user_id, user_id, HISTORY_LIMIT))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        self._invalidate(("history", user_id))
+
+    def recent_generations(self, user_id: str, limit: int = 10) -> List[Dict]:
+        """Newest entries for the history list; the generated text itself stays in the database"""
+        def load():
+            with self.connection() as conn:
+                rows = conn.execute("SELECT id, kind, topic, created_at FROM generations WHERE user_id = ? "
+                                    "ORDER BY created_at DESC LIMIT ?", (user_id, min(limit, HISTORY_LIMIT))).fetchall()
+            return [{"id": r[0], "kind": r[1], "topic": r[2], "created_at": r[3]} for r in rows]
+        return self._cached(("history", user_id, limit), load)
+
+    # ── Idea dedupe index (MinHash signatures and LSH buckets, see yoga_dedupe) ──
+
+    def idea_candidates(self, owner: str, keys: List[int]) -> List[tuple]:
+        """Ideas sharing at least one LSH bucket with the given keys (one index probe per key)"""
+        placeholders = ", ".join("?" * len(keys))
+        with self.connection() as conn:
+            return conn.execute(f"SELECT DISTINCT i.id, i.title, i.signature FROM idea_buckets b JOIN ideas i ON i.id = b.idea_id "
+                                f"WHERE b.owner = ? AND b.bucket IN ({placeholders})", [owner] + keys).fetchall()
+
+    def add_idea(self, owner: str, title: str, signature: bytes, keys: List[int]) -> int:
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                idea_id = conn.execute("INSERT INTO ideas (owner, title, signature, created_at) VALUES (?, ?, ?, ?)",
+                                       (owner, title, signature, time.time())).lastrowid
+                conn.executemany("INSERT INTO idea_buckets (owner, bucket, idea_id) VALUES (?, ?, ?)",
+                                 [(owner, bucket, idea_id) for bucket in keys])
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return idea_id
+
+    def owner_has_ideas(self, owner: str) -> bool:
+        with self.connection() as conn:
+            return conn.execute("SELECT 1 FROM ideas WHERE owner = ? LIMIT 1", (owner,)).fetchone() is not None
+
+    def close(self):
+        while not self.pool.empty():
+            self.pool.get_nowait().close()
@@ -0,0 +1,304 @@
+"""
+Posting-Time Optimizer
+Day-of-week × hour engagement histograms from local post data, turned into the best posting slots per lifestyle
+"""
+
+import io
+import logging
+import os
+import re
+import threading
+import time
+from typing import List, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from yoga_hashtags import STYLE_NICHES
+
+logger = logging.getLogger(__name__)
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+# CSV of past posts: posted_at (local time), engagement, and optionally account and niche
+DATA_PATH = os.getenv('YOGAGLOW_ENGAGEMENT_DATA') or os.path.join(APP_DIR, "data", "engagement.csv")
+REFRESH_SECONDS = 60
+# Posts' worth of weight the prior carries in every slot; sparse slots stay close to it
+PRIOR_WEIGHT = 20.0
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+SLOTS = 7 * 24
+ALL_NICHES = "all"
+
+# Typical Instagram engagement by hour (relative), used until there's data: early morning, lunch and evening peaks.
+# Weekends run about two hours later in the morning
+_WEEKDAY = [0.3, 0.2, 0.15, 0.1, 0.15, 0.4, 0.9, 1.4, 1.3, 1.0, 0.9, 1.0,
+            1.3, 1.2, 0.9, 0.8, 0.9, 1.2, 1.5, 1.6, 1.4, 1.1, 0.8, 0.5]
+_WEEKEND = _WEEKDAY[-2:] + _WEEKDAY[:-2]
+PRIOR = np.array([_WEEKDAY] * 5 + [_WEEKEND] * 2).ravel()
+PRIOR = PRIOR / PRIOR.mean()
+
+# Hours each lifestyle can realistically post in (weekday, weekend)
+LIFESTYLE_HOURS = {
+    "full_time_job": ([6, 7, 12, 17, 18, 19, 20, 21], list(range(8, 21))),
+    "stay_at_home": (list(range(7, 21)), list(range(8, 20))),
+    "teaching_classes": ([6, 11, 12, 13, 14, 19, 20, 21], list(range(12, 20))),
+}
+
+# How far (hours) a retimed post may move from its planned time
+DAYPART_HOURS = 2
+
+CLOCK_TIME = re.compile(r"^(\d{1,2}):\d{2} ([AP]M)$")
+WINDOW_PATTERN = re.compile(r"(\d{1,2})(am|pm)?-(\d{1,2})(am|pm)")
+DAY_PATTERN = re.compile("|".join(DAYS))
+
+
+def format_hour(hour: int) -> str:
+    """7 → '7:00 AM'"""
+    return f"{(hour - 1) % 12 + 1}:00 {'AM' if hour < 12 else 'PM'}"
+
+
+def format_window(start: int, end: int) -> str:
+    """(7, 9) → '7-9am', (11, 13) → '11am-1pm'"""
+    def short(hour):
+        return f"{(hour - 1) % 12 + 1}{'am' if hour % 24 < 12 else 'pm'}"
+    if (start < 12) == (end % 24 < 12):
+        return f"{(start - 1) % 12 + 1}-{short(end)}"
+    return f"{short(start)}-{short(end)}"
+
+
+def parse_hour(match: re.Match) -> int:
+    """CLOCK_TIME match → 24h hour"""
+    return int(match.group(1)) % 12 + (12 if match.group(2) == "PM" else 0)
+
+
+def parse_window_start(match: re.Match) -> int:
+    """WINDOW_PATTERN match ('7-9am', '10am-12pm', '6-8pm') → 24h start hour"""
+    start, end = int(match.group(1)) % 12, int(match.group(3)) % 12
+    suffix = match.group(2) or (match.group(4) if start < end else {"am": "pm", "pm": "am"}[match.group(4)])
+    return start + (12 if suffix == "pm" else 0)
+
+
+def allowed_mask(lifestyle: str) -> np.ndarray:
+    """(7, 24) booleans: where this lifestyle can post"""
+    weekday, weekend = LIFESTYLE_HOURS.get(lifestyle, LIFESTYLE_HOURS["full_time_job"])
+    mask = np.zeros((7, 24), dtype=bool)
+    mask[:5, weekday] = True
+    mask[5:, weekend] = True
+    return mask
+
+
+def read_posts(source) -> pd.DataFrame:
+    """slot (day * 24 + hour), engagement, account and niche columns from a CSV path or file object.
+    Rows whose posted_at doesn't parse are dropped"""
+    frame = pd.read_csv(source)
+    posted = pd.to_datetime(frame["posted_at"], format="ISO8601", errors="coerce")
+    valid = posted.notna()
+    if not valid.all():
+        logger.warning("Skipping %d engagement rows with an unreadable posted_at", int((~valid).sum()))
+        frame, posted = frame[valid], posted[valid]
+    return pd.DataFrame({
+        "slot": (posted.dt.dayofweek * 24 + posted.dt.hour).to_numpy(),
+        "engagement": pd.to_numeric(frame["engagement"], errors="coerce").fillna(0).to_numpy(dtype=np.float64),
+        "account": frame["account"].to_numpy() if "account" in frame else "",
+        "niche": frame["niche"].to_numpy() if "niche" in frame else ALL_NICHES,
+    })
+
+
+class TimingOptimizer:
+    """Engagement sums and post counts per (niche, slot); new posts are folded in with one bincount"""
+
+    def __init__(self, path: Optional[str] = DATA_PATH):
+        self.path = path
+        self.offset = 0  # bytes of the data file already read
+        self.header = b""
+        self.checked_at = 0.0
+        self.niches: List[str] = [ALL_NICHES]
+        self.sums = np.zeros((1, SLOTS))
+        self.counts = np.zeros((1, SLOTS))
+        self.account_totals: Dict[str, List[float]] = {}
+        self.versions: Dict[str, int] = {}
+        self.cache: Dict[tuple, tuple] = {}
+        self.lock = threading.Lock()
+        self.refresh_lock = threading.Lock()
+        self.refresh(force=True)
+
+    # ── Data ──────────────────────────────────────────────────────────────────
+
+    def add(self, posts: pd.DataFrame):
+        """Fold new posts into the histograms. Engagement is divided by the account's average so big and small
+        accounts weigh the same (rows already folded keep the average known at the time)"""
+        if posts.empty:
+            return
+        engagement = posts["engagement"].to_numpy(dtype=np.float64)
+        slots = posts["slot"].to_numpy()
+        # Factorize first so string work happens once per distinct account / niche, not per row
+        account_codes, accounts = pd.factorize(posts["account"], use_na_sentinel=False)
+        niche_codes, niches = pd.factorize(posts["niche"], use_na_sentinel=False)
+        niches = [str(n).strip().lower() if isinstance(n, str) and n.strip() else ALL_NICHES for n in niches]
+        with self.lock:
+            sums = np.bincount(account_codes, weights=engagement, minlength=len(accounts))
+            counts = np.bincount(account_codes, minlength=len(accounts))
+            means = np.empty(len(accounts))
+            for i, account in enumerate(str(a) for a in accounts):
+                totals = self.account_totals.setdefault(account, [0.0, 0])
+                totals[0] += float(sums[i])
+                totals[1] += int(counts[i])
+                means[i] = totals[0] / totals[1]
+            row_means = means[account_codes]
+            lift = np.divide(engagement, row_means, out=np.ones_like(engagement), where=row_means > 0)
+
+            for niche in niches:
+                if niche not in self.niches:
+                    self.niches.append(niche)
+            rows = np.array([self.niches.index(n) for n in niches])[niche_codes]
+            if len(self.niches) > len(self.sums):
+                grow = len(self.niches) - len(self.sums)
+                self.sums = np.vstack([self.sums, np.zeros((grow, SLOTS))])
+                self.counts = np.vstack([self.counts, np.zeros((grow, SLOTS))])
+
+            keys = rows * SLOTS + slots
+            size = len(self.niches) * SLOTS
+            self.sums += np.bincount(keys, weights=lift, minlength=size).reshape(-1, SLOTS)
+            self.counts += np.bincount(keys, minlength=size).reshape(-1, SLOTS)
+            # Rows tagged with a niche also count towards everyone's histogram
+            tagged = rows != 0
+            self.sums[0] += np.bincount(slots[tagged], weights=lift[tagged], minlength=SLOTS)
+            self.counts[0] += np.bincount(slots[tagged], minlength=SLOTS)
+
+            # Only schedules built from the touched niches (and the shared one) need recomputing
+            for niche in set(niches) | {ALL_NICHES}:
+                self.versions[niche] = self.versions.get(niche, 0) + 1
+
+    def refresh(self, force: bool = False):
+        """Read rows appended to the data file since the last read"""
+        if not self.path or (not force and time.monotonic() - self.checked_at < REFRESH_SECONDS):
+            return
+        if not self.refresh_lock.acquire(blocking=False):
+            return  # another session is already reading the new rows
+        try:
+            self._read_new_rows()
+        finally:
+            self.refresh_lock.release()
+
+    def _read_new_rows(self):
+        self.checked_at = time.monotonic()
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return
+        if size < self.offset:  # replaced rather than appended: start over
+            with self.lock:
+                self.offset, self.niches = 0, [ALL_NICHES]
+                self.sums, self.counts = np.zeros((1, SLOTS)), np.zeros((1, SLOTS))
+                self.account_totals.clear()
+                for niche in self.versions:
+                    self.versions[niche] += 1
+        if size == self.offset:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            chunk = f.read()
+        if not self.offset:
+            self.header, _, chunk = chunk.partition(b"\n")
+            self.header += b"\n"
+            self.offset = len(self.header)
+        complete = chunk[:chunk.rfind(b"\n") + 1]  # a row still being written waits for the next refresh
+        if complete:
+            # Move past the rows first: a chunk that can't be read is skipped, not retried on every call
+            self.offset += len(complete)
+            try:
+                posts = read_posts(io.BytesIO(self.header + complete))
+            except (ValueError, KeyError) as e:
+                logger.warning("Skipping %d bytes of unreadable engagement data in %s: %s", len(complete), self.path, e)
+                return
+            self.add(posts)
+
+    # ── Scores and schedules ─────────────────────────────────────────────────
+
+    def scores(self, niche: Optional[str] = None) -> np.ndarray:
+        """(7, 24) expected engagement lift per slot: the niche's data shrunk towards everyone's, then the prior"""
+        with self.lock:
+            overall = (self.sums[0] + PRIOR_WEIGHT * PRIOR) / (self.counts[0] + PRIOR_WEIGHT)
+            if niche and niche in self.niches[1:]:
+                row = self.niches.index(niche)
+                overall = (self.sums[row] + PRIOR_WEIGHT * overall) / (self.counts[row] + PRIOR_WEIGHT)
+        return overall.reshape(7, 24)
+
+    def data_points(self, niche: Optional[str] = None) -> int:
+        with self.lock:
+            row = self.niches.index(niche) if niche in self.niches else 0
+            return int(self.counts[row].sum())
+
+    def _version(self, niche: Optional[str]) -> tuple:
+        return self.versions.get(ALL_NICHES, 0), self.versions.get(niche, 0) if niche else 0
+
+    def plan(self, lifestyle: str, niche: Optional[str] = None) -> Dict:
+        """Slot scores masked to the lifestyle's hours, plus the top slots overall.
+        Cached per (lifestyle, niche) until data for that niche (or everyone's) changes"""
+        self.refresh()
+        niche = STYLE_NICHES.get(niche, niche)
+        key = (lifestyle, niche)
+        version = self._version(niche)
+        hit = self.cache.get(key)
+        if hit and hit[0] == version:
+            return hit[1]
+
+        scores = self.scores(niche)
+        allowed = np.where(allowed_mask(lifestyle), scores, -np.inf)
+        top = np.argsort(allowed, axis=None)[::-1][:5]
+        plan = {
+            "allowed": allowed,
+            # A window starting at h covers h and h+1; both must be allowed
+            "windows": allowed[:, :-1] + allowed[:, 1:],
+            "top_slots": [{"day": DAYS[i // 24], "time": format_hour(i % 24), "lift": round(float(scores.flat[i]), 2)}
+                          for i in top],
+            "data_points": self.data_points(niche),
+            "version": version,
+        }
+        self.cache[key] = (version, plan)
+        return plan
+
+    @staticmethod
+    def _best_near(row: np.ndarray, hour: int) -> Optional[int]:
+        """Best allowed hour within DAYPART_HOURS of the original, so a 'morning practice' post stays in the morning"""
+        low, high = max(hour - DAYPART_HOURS, 0), min(hour + DAYPART_HOURS + 1, len(row))
+        best = low + int(row[low:high].argmax())
+        return best if np.isfinite(row[best]) else None
+
+    def retime_schedule(self, schedule: Dict, lifestyle: str, niche: Optional[str] = None) -> Dict:
+        """The schedule with each clock time moved to the best nearby hour that day; 'Multiple', '-' etc. stay"""
+        plan = self.plan(lifestyle, niche)
+        days = {}
+        for day, info in schedule.get("schedule", {}).items():
+            match = CLOCK_TIME.match(info["time"])
+            best = self._best_near(plan["allowed"][DAYS.index(day)], parse_hour(match)) if match else None
+            days[day] = dict(info, time=format_hour(best)) if best is not None else info
+        return dict(schedule, schedule=days, best_slots=plan["top_slots"], data_points=plan["data_points"],
+                    version=plan["version"])
+
+    def best_time(self, best_time: str, lifestyle: str, niche: Optional[str] = None) -> str:
+        """'Tuesday or Wednesday 7-9am' → the better of those days, with its best 2-hour window near 7am"""
+        days = DAY_PATTERN.findall(best_time)
+        window = WINDOW_PATTERN.search(best_time)
+        if not days or not window:
+            return best_time
+        plan = self.plan(lifestyle, niche)
+        start = parse_window_start(window)
+        options = [(day, self._best_near(plan["windows"][DAYS.index(day)], start)) for day in days]
+        options = [(plan["windows"][DAYS.index(day), hour], day, hour) for day, hour in options if hour is not None]
+        if not options:
+            return best_time
+        _, day, hour = max(options, key=lambda option: option[0])  # ties go to the day listed first
+        return f"{day} {format_window(hour, hour + 2)}"
+
+
+_default_optimizer: Optional[TimingOptimizer] = None
+_default_lock = threading.Lock()
+
+
+def default_optimizer() -> TimingOptimizer:
+    global _default_optimizer
+    with _default_lock:
+        if _default_optimizer is None:
+            _default_optimizer = TimingOptimizer()
+        return _default_optimizer
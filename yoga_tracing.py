@@ -0,0 +1,208 @@
+"""
+Local Tracing
+Spans for each rerun and the work under it, written to a local file as OpenTelemetry (OTLP/JSON) traces
+"""
+
+import contextvars
+import functools
+import json
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+# One OTLP/JSON ExportTraceServiceRequest per line, one line per trace; tracing is off unless this is set
+TRACE_FILE = os.getenv('YOGAGLOW_TRACE_FILE', '')
+# Share of root spans (reruns, background jobs) traced; their children follow the root's decision
+TRACE_SAMPLE = float(os.getenv('YOGAGLOW_TRACE_SAMPLE', '1.0'))
+ENABLED = bool(TRACE_FILE)
+SERVICE_NAME = "yogaglow"
+
+# OTLP span kinds
+INTERNAL = 1
+CLIENT = 3
+STATUS_ERROR = 2
+
+_current: contextvars.ContextVar = contextvars.ContextVar("yogaglow_span", default=None)
+
+
+def otlp_value(value) -> Dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}  # int64 travels as a string in OTLP/JSON
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Trace:
+    __slots__ = ("trace_id", "spans")
+
+    def __init__(self):
+        self.trace_id = os.urandom(16).hex()
+        self.spans: List["Span"] = []
+
+
+class Span:
+    __slots__ = ("name", "kind", "attributes", "trace", "span_id", "parent_id", "start_ns", "end_ns", "error", "_token")
+
+    def __init__(self, name: str, attributes: Optional[Dict], kind: int, trace: Trace, parent: Optional["Span"]):
+        self.name = name
+        self.kind = kind
+        self.attributes = dict(attributes) if attributes else {}
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent is not None else None
+        self.start_ns = self.end_ns = 0
+        self.error: Optional[str] = None
+
+    def set(self, key: str, value):
+        if value is not None:
+            self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        self._token = _current.set(self)
+        self.start_ns = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.end_ns = time.time_ns()
+        _current.reset(self._token)
+        # Streamlit's rerun/stop signals are BaseExceptions, not failures
+        if isinstance(exc, Exception):
+            self.error = f"{exc_type.__name__}: {exc}"
+        self.trace.spans.append(self)
+        if self.parent_id is None:
+            default_exporter().export(self.trace)
+        return False
+
+    def to_otlp(self) -> Dict:
+        span = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": key, "value": otlp_value(value)} for key, value in self.attributes.items()],
+            "status": {"code": STATUS_ERROR, "message": self.error} if self.error else {},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class _NoopSpan:
+    """Stands in for a span when tracing is off or the trace wasn't sampled"""
+
+    def set(self, key: str, value):
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+NOOP = _NoopSpan()
+
+
+class _UnsampledRoot(_NoopSpan):
+    """Marks its scope as not sampled, so spans under it don't start traces of their own"""
+
+    def __enter__(self) -> "_UnsampledRoot":
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        _current.reset(self._token)
+        return False
+
+
+def span(name: str, attributes: Optional[Dict] = None, kind: int = INTERNAL):
+    """Context manager for one span under the current one; with no current span it starts a (sampled) trace"""
+    if not ENABLED:
+        return NOOP
+    parent = _current.get()
+    if parent is None:
+        if random.random() >= TRACE_SAMPLE:
+            return _UnsampledRoot()
+        return Span(name, attributes, kind, Trace(), None)
+    if not isinstance(parent, Span):
+        return NOOP
+    return Span(name, attributes, kind, parent.trace, parent)
+
+
+def current_span():
+    """The innermost open span (NOOP when there is none), for adding attributes from deeper code"""
+    current = _current.get()
+    return current if isinstance(current, Span) else NOOP
+
+
+def traced(name: str, kind: int = INTERNAL):
+    """Decorator: run the function in a span. With tracing off the function is returned as is"""
+    def decorate(fn: Callable) -> Callable:
+        if not ENABLED:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name, kind=kind):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def trace_methods(prefix: str):
+    """Class decorator: a span per public method call, named prefix.method. No-op with tracing off"""
+    def decorate(cls):
+        if ENABLED:
+            for attr, value in list(vars(cls).items()):
+                if callable(value) and not attr.startswith("_"):
+                    setattr(cls, attr, traced(f"{prefix}.{attr}")(value))
+        return cls
+    return decorate
+
+
+def in_context(fn: Callable) -> Callable:
+    """Bind fn to the caller's context, so spans it opens on a pool thread nest under the caller's span"""
+    if not ENABLED:
+        return fn
+    return functools.partial(contextvars.copy_context().run, fn)
+
+
+class TraceExporter:
+    def __init__(self, path: str = TRACE_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.exported = 0
+
+    def export(self, trace: Trace):
+        request = {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}},
+                                        {"key": "process.pid", "value": {"intValue": str(os.getpid())}}]},
+            "scopeSpans": [{"scope": {"name": "yoga_tracing"}, "spans": [s.to_otlp() for s in trace.spans]}],
+        }]}
+        line = json.dumps(request, ensure_ascii=False, default=str)
+        with self.lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            self.exported += 1
+
+
+_default_exporter: Optional[TraceExporter] = None
+_default_lock = threading.Lock()
+
+
+def default_exporter() -> TraceExporter:
+    global _default_exporter
+    with _default_lock:
+        if _default_exporter is None:
+            directory = os.path.dirname(TRACE_FILE)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            _default_exporter = TraceExporter()
+        return _default_exporter
@@ -0,0 +1,141 @@
+"""
+Yoga Trends Module
+Google Trends lookups for rising yoga searches, shared by the app and the headless API
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Dict, Optional
+
+from yoga_http import PooledTrendReq
+from yoga_tracing import span
+
+# Terms to exclude (tech/laptop related)
+EXCLUDED_TERMS = ['lenovo', 'laptop', 'tablet', 'thinkpad', 'battery', 'charger', 'deal', 'specs', 'price', 'windows', 'keyboard']
+
+# How long fetched rising searches stay fresh, and how many Google Trends lookups run at once
+RISING_TTL = 3600
+TRENDS_WORKERS = int(os.getenv('YOGAGLOW_TRENDS_WORKERS', '2'))
+# Keywords remembered (least recently asked for go first, expired ones before that) and lookups queued at once
+TRENDS_KEYWORDS = int(os.getenv('YOGAGLOW_TRENDS_KEYWORDS', '200'))
+
+class TrendAnalyzer:
+    def __init__(self):
+        try:
+            self.pytrends = PooledTrendReq(hl='en-US', tz=360)
+        except:
+            self.pytrends = None
+
+    def get_rising_yoga_topics(self, keyword: str = "yoga poses") -> List[Dict]:
+        if not self.pytrends:
+            return []
+        try:
+            self.pytrends.build_payload([keyword], timeframe='today 3-m')
+            related = self.pytrends.related_queries()
+            rising_topics = []
+
+            if keyword in related and related[keyword]['rising'] is not None:
+                for _, row in related[keyword]['rising'].head(15).iterrows():
+                    topic = row['query'].lower()
+
+                    # Skip if topic contains any excluded terms
+                    if any(term in topic for term in EXCLUDED_TERMS):
+                        continue
+
+                    growth = row['value']
+                    score = 95 if isinstance(growth, str) and 'Breakout' in str(growth) else min(100, int(50 + (int(growth) / 10))) if str(growth).isdigit() else 50
+                    rising_topics.append({'topic': row['query'], 'growth': growth, 'viral_potential': score})
+
+                    if len(rising_topics) >= 8:
+                        break
+
+            return rising_topics
+        except:
+            return []
+
+
+class TrendFetcher:
+    """Rising searches per keyword, fetched on a background pool so callers get the last known topics straight away"""
+
+    def __init__(self, ttl: float = RISING_TTL, workers: int = TRENDS_WORKERS,
+                 fetch: Optional[Callable[[str], List[Dict]]] = None, max_keywords: int = TRENDS_KEYWORDS):
+        self.ttl = ttl
+        self.max_keywords = max_keywords
+        self.fetch = fetch or (lambda keyword: TrendAnalyzer().get_rising_yoga_topics(keyword))
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="trends")
+        # keyword → (last checked, monotonic; last updated, epoch seconds or None; topics)
+        self.results: "OrderedDict[str, tuple]" = OrderedDict()
+        self.jobs: Dict[str, Future] = {}
+        self.counts = {"fetches": 0, "shared": 0, "empty": 0, "dropped": 0}
+        self.lock = threading.Lock()
+
+    def job(self, keyword: str) -> Future:
+        """The keyword's in-flight fetch, started if there isn't one; everyone asking meanwhile shares it.
+        With max_keywords lookups already queued, a finished one holding the last known topics instead"""
+        with self.lock:
+            job = self.jobs.get(keyword)
+            if job is None and len(self.jobs) >= self.max_keywords:
+                self.counts["dropped"] += 1
+                job = Future()
+                job.set_result(self.results.get(keyword, (None, None, []))[2])
+            elif job is None:
+                job = self.jobs[keyword] = self.pool.submit(self._run, keyword)
+                self.counts["fetches"] += 1
+            else:
+                self.counts["shared"] += 1
+            return job
+
+    def _run(self, keyword: str) -> List[Dict]:
+        try:
+            with span("trends.fetch", {"yoga.keyword": keyword}) as fetch_span:
+                topics = self.fetch(keyword)
+                fetch_span.set("yoga.topics", len(topics))
+            with self.lock:
+                _, updated_at, previous = self.results.get(keyword, (0.0, None, []))
+                if not topics:
+                    # Lookups fail quietly (throttling, no network): keep showing what we had until the next try
+                    self.counts["empty"] += 1
+                    topics = previous
+                else:
+                    updated_at = time.time()
+                self.results[keyword] = (time.monotonic(), updated_at, topics)
+                self.results.move_to_end(keyword)
+                self._evict()
+            return topics
+        finally:
+            with self.lock:
+                self.jobs.pop(keyword, None)
+
+    def _evict(self):
+        """Down to max_keywords: expired keywords first, then the least recently asked for (lock held)"""
+        if len(self.results) <= self.max_keywords:
+            return
+        cutoff = time.monotonic() - self.ttl
+        for keyword in [k for k, (checked_at, _, _) in self.results.items() if checked_at < cutoff]:
+            if len(self.results) <= self.max_keywords:
+                return
+            del self.results[keyword]
+        while len(self.results) > self.max_keywords:
+            self.results.popitem(last=False)
+
+    def refreshing(self, keyword: str) -> bool:
+        with self.lock:
+            return keyword in self.jobs
+
+    def get(self, keyword: str, refresh: bool = False) -> Dict:
+        """Last known topics, starting a background fetch when they are stale (or refresh is set); never waits on Google"""
+        with self.lock:
+            checked_at, updated_at, topics = self.results.get(keyword, (None, None, []))
+            if checked_at is not None:
+                self.results.move_to_end(keyword)
+            stale = refresh or checked_at is None or time.monotonic() - checked_at > self.ttl
+        if stale:
+            self.job(keyword)
+        return {"keyword": keyword, "topics": topics, "updated_at": updated_at, "refreshing": self.refreshing(keyword)}
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return dict(self.counts, in_flight=len(self.jobs), keywords=len(self.results))
@@ -3,7 +3,6 @@ Yoga Content Discovery Module
 Specialized viral video discovery for yoga instructors building their Instagram presence
 """
 
-import requests
 import json
 from typing import List, Dict, Optional
 from datetime import datetime, timedelta
@@ -11,14 +10,60 @@ import re
 import time
 import random
 
+from yoga_calendar import ContentCalendar
+from yoga_forecast import forecast_milestones
+from yoga_hashtags import default_engine
+from yoga_http import default_session
+from yoga_tracing import trace_methods
+from yoga_timing import default_optimizer
+
+# Follower counts worth celebrating, in order
+GROWTH_MILESTONES = [
+    {
+        "target": 250,
+        "what_changes": "You'll start seeing consistent engagement",
+        "celebration": "🎉 You've built your first community!",
+        "unlock": "Your hashtags start working better"
+    },
+    {
+        "target": 500,
+        "what_changes": "Reels start getting pushed to Explore more",
+        "celebration": "🎉 Halfway to 1K!",
+        "unlock": "Brands might start noticing you"
+    },
+    {
+        "target": 1000,
+        "what_changes": "You unlock Link in Stories!",
+        "celebration": "🎉 You're officially a micro-influencer!",
+        "unlock": "Link stickers, better analytics, collabs easier"
+    },
+    {
+        "target": 2500,
+        "what_changes": "Consistent viral potential",
+        "celebration": "🎉 You have a real audience!",
+        "unlock": "Can start thinking about monetization"
+    },
+    {
+        "target": 5000,
+        "what_changes": "Significant organic reach",
+        "celebration": "🎉 You're building a brand!",
+        "unlock": "Paid partnerships become viable"
+    },
+    {
+        "target": 10000,
+        "what_changes": "Authority status in niche",
+        "celebration": "🎉 10K Club! You made it!",
+        "unlock": "Swipe up (legacy), Creator Fund eligibility"
+    }
+]
+
+
+@trace_methods("discovery")
 class YogaViralDiscovery:
     """Discover and analyze viral yoga content with beginner-friendly insights"""
     
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+        self.session = default_session()
         
         # Yoga-specific content categories
         self.yoga_categories = [
@@ -232,8 +277,9 @@ class YogaViralDiscovery:
         
         return trending_examples[:limit]
 
-    def get_content_ideas_for_beginners(self, week_number: int = 1) -> List[Dict]:
-        """Generate week-by-week content ideas for new yoga instructors"""
+    def get_content_ideas_for_beginners(self, week_number: int = 1, lifestyle: Optional[str] = None,
+                                        niche: Optional[str] = None) -> List[Dict]:
+        """Generate week-by-week content ideas for new yoga instructors (best times fitted to the lifestyle if given)"""
         
         weekly_themes = {
             1: {
@@ -394,66 +440,19 @@ class YogaViralDiscovery:
             }
         }
         
-        return weekly_themes.get(week_number, weekly_themes[1])
+        week = weekly_themes.get(week_number, weekly_themes[1])
+        if lifestyle:
+            optimizer = default_optimizer()
+            for idea in week["ideas"]:
+                idea["best_time"] = optimizer.best_time(idea["best_time"], lifestyle, niche)
+        return week
 
-    def get_hashtag_strategy(self, follower_count: int = 100) -> Dict:
-        """Get optimized hashtag strategy based on account size"""
-        
-        if follower_count < 500:
-            return {
-                "strategy": "Micro-Niche Focus",
-                "total_hashtags": "20-25",
-                "mix": {
-                    "small_niche": {
-                        "count": 10,
-                        "range": "1K-50K posts",
-                        "examples": ["#yogaathome", "#gentleyogaflow", "#beginneryogapractice", "#deskstretches", "#morningyogaflow"]
-                    },
-                    "medium_niche": {
-                        "count": 8,
-                        "range": "50K-500K posts",
-                        "examples": ["#yogaforbeginners", "#yogaeverydamnday", "#yogatips", "#yogainspiration", "#yogalife"]
-                    },
-                    "large_broad": {
-                        "count": 5,
-                        "range": "500K-2M posts",
-                        "examples": ["#yoga", "#yogapractice", "#yogalove", "#instayoga", "#yogajourney"]
-                    },
-                    "mega_discovery": {
-                        "count": 2,
-                        "range": "2M+ posts (for Explore)",
-                        "examples": ["#wellness", "#selfcare"]
-                    }
-                },
-                "tip": "Focus on smaller hashtags where you can actually rank! Big hashtags bury small accounts."
-            }
-        elif follower_count < 1000:
-            return {
-                "strategy": "Growth Expansion",
-                "total_hashtags": "20-30",
-                "mix": {
-                    "small_niche": {"count": 8, "range": "5K-100K posts"},
-                    "medium_niche": {"count": 10, "range": "100K-500K posts"},
-                    "large_broad": {"count": 8, "range": "500K-2M posts"},
-                    "mega_discovery": {"count": 4, "range": "2M+ posts"}
-                },
-                "tip": "You can start competing in medium-sized hashtags now!"
-            }
-        else:
-            return {
-                "strategy": "Authority Building",
-                "total_hashtags": "15-25",
-                "mix": {
-                    "branded": {"count": 2, "range": "Your own hashtags"},
-                    "medium_niche": {"count": 8, "range": "100K-1M posts"},
-                    "large_broad": {"count": 10, "range": "1M+ posts"},
-                    "trending": {"count": 5, "range": "Current trending tags"}
-                },
-                "tip": "Time to create your own branded hashtag for community!"
-            }
+    def get_hashtag_strategy(self, follower_count: int = 100, niche: Optional[str] = None) -> Dict:
+        """Get optimized hashtag strategy with real tags for the account size (niche: a dataset niche or yoga focus)"""
+        return default_engine().strategy(follower_count, niche)
 
-    def get_posting_schedule(self, lifestyle: str = "full_time_job") -> Dict:
-        """Get realistic posting schedule based on lifestyle"""
+    def get_posting_schedule(self, lifestyle: str = "full_time_job", niche: Optional[str] = None) -> Dict:
+        """Get realistic posting schedule based on lifestyle, timed from engagement data (niche: dataset niche or yoga focus)"""
         
         schedules = {
             "full_time_job": {
@@ -505,7 +504,8 @@ class YogaViralDiscovery:
             }
         }
         
-        return schedules.get(lifestyle, schedules["full_time_job"])
+        lifestyle = lifestyle if lifestyle in schedules else "full_time_job"
+        return default_optimizer().retime_schedule(schedules[lifestyle], lifestyle, niche)
 
     def get_engagement_tactics(self) -> List[Dict]:
         """Get engagement tactics specifically for yoga accounts"""
@@ -548,70 +548,30 @@ class YogaViralDiscovery:
             }
         ]
 
-    def get_growth_milestones(self, current_followers: int = 100) -> Dict:
-        """Get realistic growth milestones with celebration points"""
+    def get_growth_milestones(self, current_followers: int = 100, lifestyle: str = "full_time_job") -> Dict:
+        """Get growth milestones with celebration points, timed by a growth forecast at the lifestyle's posting cadence"""
+        schedule = self.get_posting_schedule(lifestyle)
+        milestones = [dict(m) for m in GROWTH_MILESTONES]
+        forecasts = forecast_milestones(current_followers, schedule["posts_per_week"], schedule.get("reels_per_week", 0),
+                                        [m["target"] for m in milestones])
+        for milestone, forecast in zip(milestones, forecasts):
+            milestone["timeframe"] = forecast["timeframe"]
+            milestone["forecast"] = {key: forecast[key] for key in ("p10", "p50", "p90", "probability")}
         return {
             "current": current_followers,
-            "milestones": [
-                {
-                    "target": 250,
-                    "timeframe": "4-6 weeks",
-                    "what_changes": "You'll start seeing consistent engagement",
-                    "celebration": "🎉 You've built your first community!",
-                    "unlock": "Your hashtags start working better"
-                },
-                {
-                    "target": 500,
-                    "timeframe": "2-3 months",
-                    "what_changes": "Reels start getting pushed to Explore more",
-                    "celebration": "🎉 Halfway to 1K!",
-                    "unlock": "Brands might start noticing you"
-                },
-                {
-                    "target": 1000,
-                    "timeframe": "4-6 months",
-                    "what_changes": "You unlock Link in Stories!",
-                    "celebration": "🎉 You're officially a micro-influencer!",
-                    "unlock": "Link stickers, better analytics, collabs easier"
-                },
-                {
-                    "target": 2500,
-                    "timeframe": "6-9 months",
-                    "what_changes": "Consistent viral potential",
-                    "celebration": "🎉 You have a real audience!",
-                    "unlock": "Can start thinking about monetization"
-                },
-                {
-                    "target": 5000,
-                    "timeframe": "9-12 months",
-                    "what_changes": "Significant organic reach",
-                    "celebration": "🎉 You're building a brand!",
-                    "unlock": "Paid partnerships become viable"
-                },
-                {
-                    "target": 10000,
-                    "timeframe": "12-18 months",
-                    "what_changes": "Authority status in niche",
-                    "celebration": "🎉 10K Club! You made it!",
-                    "unlock": "Swipe up (legacy), Creator Fund eligibility"
-                }
-            ],
+            "cadence": f"{schedule['posts_per_week']} posts/week ({schedule.get('reels_per_week', 0)} reels)",
+            "milestones": milestones,
             "remember": "Growth isn't linear. Some weeks you'll gain 50 followers, others you'll lose 10. That's normal! Focus on serving your community, not the numbers."
         }
 
-    def get_content_calendar_template(self, month: str = "Month 1") -> Dict:
-        """Get a content calendar template for the month"""
+    def get_content_calendar_template(self, month: str = "Month 1", lifestyle: str = "full_time_job",
+                                      niche: Optional[str] = None) -> Dict:
+        """Get the content calendar for a month of the plan; only that month's four weeks are built"""
+        calendar = ContentCalendar(self, lifestyle, niche)
         return {
-            "month": month,
-            "theme": "Foundation Building",
-            "weekly_rhythm": {
-                "week_1": self.get_content_ideas_for_beginners(1),
-                "week_2": self.get_content_ideas_for_beginners(2),
-                "week_3": self.get_content_ideas_for_beginners(3),
-                "week_4": self.get_content_ideas_for_beginners(4)
-            },
+            **calendar.month(month),
             "monthly_goals": {
-                "reels": 8,
+                "reels": calendar.schedule.get("reels_per_week", 2) * 4,
                 "stories": 30,
                 "lives": 1,
                 "collaborations": 2,